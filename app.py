@@ -1,22 +1,18 @@
+import io
+import uuid
 import streamlit as st
+import matplotlib.pyplot as plt
 from pathlib import Path
 
-from src.io_utils import read_fasta
+from src.io_utils import read_fasta, parse_fasta
 from src.translate import dna_to_rna, translate_dna
 from src.align import needleman_wunsch, smith_waterman, center_star_msa
 from src.distance import distance_matrix
 from src.tree import upgma, to_newick
 from src.rna_fold import nussinov
-from src.visualize_pretty import (
-    plot_gc_content,
-    plot_codon_usage,
-    plot_distance_heatmap,
-    plot_alignment,
-    plot_rna_arcs,
-)
-
-# ⭐ If you enabled the pretty theme earlier, keep this import:
-from src.visualize_pretty import set_theme as pretty_set_theme  # optional
+from src import visualize, visualize_pretty
+from src.jobs import JobRunner
+from src.visualize_pretty import set_theme as pretty_set_theme
 
 st.set_page_config(page_title="Genetic Visualization App", layout="wide")
 st.title("🧬 Genetic Visualization App")
@@ -30,25 +26,77 @@ with st.sidebar:
     # ⭐ NEW: a run button so we don’t recompute on every small change
     run = st.button("Run analysis")
 
-work_dir = Path("streamlit_outputs")
-work_dir.mkdir(exist_ok=True)
-
-if use_pretty:
-    pretty_set_theme(font_size=12)
-
 
 # ---------------------------
-# ⭐ NEW: Cached heavy helpers
+# ⭐ NEW: Background jobs — MSA, distances and folding run on a process pool
+# so the page stays responsive; results live in session_state per input
 # ---------------------------
-@st.cache_data(show_spinner=False)
-def cached_msa(seqs_tuple):
-    # seqs_tuple: tuple of strings (hashable for cache)
-    return center_star_msa(list(seqs_tuple))
-
-
-@st.cache_data(show_spinner=False)
-def cached_distance(seqs_tuple, model):
-    return distance_matrix(list(seqs_tuple), model=model)
+@st.cache_resource
+def get_runner():
+    return JobRunner()
+
+
+runner = get_runner()
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+job_inputs = st.session_state.setdefault("job_inputs", {})
+# collected results live in session_state (freed with the session), not in the shared runner:
+# name -> (inputs key, result, error message or None)
+job_outputs = st.session_state.setdefault("job_outputs", {})
+# jobs of sessions that stopped polling (closed tabs) are cancelled and dropped after this long
+JOB_IDLE_SECONDS = 600
+runner.prune(idle=JOB_IDLE_SECONDS)
+
+
+def ensure_job(name, key, fn, *args, **kwargs):
+    """(Re)submit job `name` when its inputs changed; the stale job is cancelled.
+    A failed job is retried when **Run analysis** is clicked again.
+    """
+    full = f"{session_id}:{name}"
+    out = job_outputs.get(name)
+    if out is not None and out[0] == key and not (run and out[2]):
+        return
+    if out is not None or job_inputs.get(name) != key or runner.get(full) is None:
+        job_outputs.pop(name, None)
+        runner.submit(full, fn, *args, **kwargs)
+        job_inputs[name] = key
+
+
+@st.fragment(run_every=0.5)
+def job_progress(name, label):
+    """Progress bar for a running job. Only this fragment reruns while polling; the page reruns once when it ends."""
+    job = runner.get(f"{session_id}:{name}")
+    if job is None or job.done():
+        st.rerun()
+    done, total = job.progress()
+    st.progress(job.fraction(), text=f"{label}: {done}/{total or '?'}")
+
+
+def job_result(name, label):
+    """Finished result, or None after drawing a progress bar (running) or an error (failed)."""
+    full = f"{session_id}:{name}"
+    out = job_outputs.get(name)
+    if out is None:
+        job = runner.get(full)
+        if job is None or job.cancelled():
+            return None
+        if not job.done():
+            job_progress(name, label)
+            return None
+        runner.pop(full)
+        try:
+            out = (job_inputs.get(name), job.result(), None)
+        except Exception as e:
+            out = (job_inputs.get(name), None, f"{type(e).__name__}: {e}")
+        job_outputs[name] = out
+    if out[2]:
+        st.error(f"{label} failed: {out[2]}. Click **Run analysis** to retry.")
+    return out[1]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_pairwise(mode, a, b):
+    aligner = needleman_wunsch if mode == "global" else smith_waterman
+    return tuple(aligner(a, b))
 
 
 @st.cache_data(show_spinner=False)
@@ -56,22 +104,36 @@ def cached_tree(names_tuple, D):
     return to_newick(upgma(list(names_tuple), D)) + ";"
 
 
+# ---------------------------
+# ⭐ NEW: Render cache — figures are PNG bytes keyed by the data + theme,
+# so unchanged plots are never redrawn or written to disk
+# ---------------------------
+@st.cache_data(show_spinner=False, max_entries=64)
+def render(kind, pretty, *args, **kwargs):
+    # each figure starts from Matplotlib defaults; the pretty theme applies only inside this context
+    with plt.rc_context():
+        plt.rcdefaults()
+        if pretty:
+            pretty_set_theme(font_size=12)
+        mod = visualize_pretty if pretty else visualize
+        return getattr(mod, kind)(*args, **kwargs)
+
+
 # ---------------------------
 # Load records (same as before)
 # ---------------------------
+DEMO_FASTA = ">seqA\nGATTACA\n>seqB\nGCATGCU\n>seqC\nGACTATA\n"
+
+
 def load_records():
     if uploaded is not None and not use_demo:
-        data = uploaded.read().decode("utf-8")
-        path = work_dir / "uploaded.fasta"
-        path.write_text(data, encoding="utf-8")
-        return read_fasta(str(path)), str(path)
+        # parse straight from the upload buffer, no temp file
+        text = io.TextIOWrapper(io.BytesIO(uploaded.getvalue()), encoding="utf-8")
+        return parse_fasta(text), uploaded.name
     else:
         demo_path = Path("data") / "example_group.fasta"
         if not demo_path.exists():
-            demo_path = work_dir / "demo.fasta"
-            demo_path.write_text(
-                ">seqA\nGATTACA\n>seqB\nGCATGCU\n>seqC\nGACTATA\n", encoding="utf-8"
-            )
+            return parse_fasta(DEMO_FASTA.splitlines()), "demo.fasta"
         return read_fasta(str(demo_path)), str(demo_path)
 
 
@@ -87,31 +149,34 @@ st.code(
     language="text",
 )
 
-# ⭐ NEW: size guardrails (tune as you like)
-MAX_SEQS_FOR_MSA = 200  # cap number of sequences
-MAX_LEN_FOR_MSA = 3000  # cap per-sequence length
-too_many = len(seqs) > MAX_SEQS_FOR_MSA
-too_long = any(len(s) > MAX_LEN_FOR_MSA for s in seqs)
-
-if too_many or too_long:
+# ⭐ NEW: size hint (heavy steps run in the background instead of being disabled)
+LARGE_SEQS = 200
+LARGE_LEN = 3000
+if len(seqs) > LARGE_SEQS or any(len(s) > LARGE_LEN for s in seqs):
     st.warning(
         f"Large input detected (n={len(seqs)}, max_len={max(len(s) for s in seqs)}). "
-        f"MSA/Distance/Tree steps are disabled to keep the app responsive. "
-        f"Consider subsetting sequences or lowering limits."
+        f"MSA/Distance/Fold run as background jobs; progress is shown below."
     )
 
-# ⭐ NEW: require click to run heavy analyses
-if not run:
+# ⭐ NEW: require click to run heavy analyses (remembered across reruns)
+if run:
+    st.session_state.started = True
+if not st.session_state.get("started"):
     st.info("Adjust settings, then click **Run analysis** in the sidebar.")
     st.stop()
 
+if len(seqs) >= 2:
+    ensure_job("msa", tuple(seqs), center_star_msa, list(seqs))
+    ensure_job("dist", (tuple(seqs), model), distance_matrix, list(seqs), model=model)
+if seqs:
+    ensure_job("fold", seqs[0], nussinov, dna_to_rna(seqs[0]).upper(), min_loop=0)
+
 # ---------------------------
 # GC content (lightweight)
 # ---------------------------
-gc_png = work_dir / "gc.png"
 with st.spinner("Plotting GC%…"):
-    plot_gc_content(recs, str(gc_png))
-st.image(str(gc_png), caption="GC% per sequence")
+    gc_png = render("plot_gc_content", use_pretty, recs)
+st.image(gc_png, caption="GC% per sequence")
 
 # ---------------------------
 # Pairwise alignment (fast)
@@ -120,39 +185,32 @@ if len(seqs) >= 2:
     s1 = st.selectbox("Sequence 1", names, index=0)
     s2 = st.selectbox("Sequence 2", names, index=min(1, len(names) - 1))
     with st.spinner("Aligning selected pair…"):
-        if mode == "global":
-            a, b, score = needleman_wunsch(recs[s1], recs[s2])
-        else:
-            a, b, score = smith_waterman(recs[s1], recs[s2])
+        a, b, score = cached_pairwise(mode, recs[s1], recs[s2])
     st.write(f"**Score:** {score}")
     st.code(a + "\n" + b, language="text")
-    pf = work_dir / "pairwise.png"
-    plot_alignment([a, b], [s1, s2], str(pf))
-    st.image(str(pf), caption="Pairwise alignment (consensus match)")
+    pf = render("plot_alignment", use_pretty, (a, b), (s1, s2))
+    st.image(pf, caption="Pairwise alignment (consensus match)")
 
 # ---------------------------
 # MSA + distance + tree (heavy)
 # ---------------------------
-if len(seqs) >= 2 and not (too_many or too_long):
-    seqs_tuple = tuple(seqs)
+if len(seqs) >= 2:
     names_tuple = tuple(names)
 
-    with st.spinner("Building MSA…"):
-        aln = cached_msa(seqs_tuple)
-    mf = work_dir / "msa.png"
-    plot_alignment(aln, names, str(mf))
-    st.image(str(mf), caption="MSA consensus view")
+    aln = job_result("msa", "Aligning pairs (MSA)")
+    if aln is not None:
+        mf = render("plot_alignment", use_pretty, tuple(aln), names_tuple)
+        st.image(mf, caption="MSA consensus view")
 
-    with st.spinner(f"Computing distances ({model})…"):
-        D = cached_distance(seqs_tuple, model)
-    df = work_dir / "dist.png"
-    plot_distance_heatmap(D, names, str(df), title=f"{model}-distance Heatmap")
-    st.image(str(df), caption="Distance matrix")
+    D = job_result("dist", f"Computing distances ({model})")
+    if D is not None:
+        df = render("plot_distance_heatmap", use_pretty, D, names_tuple, title=f"{model}-distance Heatmap")
+        st.image(df, caption="Distance matrix")
 
-    with st.spinner("Clustering tree…"):
-        newick = cached_tree(names_tuple, D)
-    (work_dir / "tree.newick").write_text(newick, encoding="utf-8")
-    st.code(newick, language="text")
+        with st.spinner("Clustering tree…"):
+            newick = cached_tree(names_tuple, D)
+        st.code(newick, language="text")
+        st.download_button("Download Newick", newick, file_name="tree.newick")
 
 # ---------------------------
 # Translation + codon usage (lightweight)
@@ -161,25 +219,23 @@ if seqs:
     prot = translate_dna(seqs[0], frame=0, stop_behavior="truncate")
     st.write("Protein (first sequence, frame 0):")
     st.code(prot, language="text")
-    cf = work_dir / "codon.png"
     with st.spinner("Plotting codon usage…"):
-        plot_codon_usage(seqs[0], str(cf))
-    st.image(str(cf), caption="Codon usage (frame 0)")
+        cf = render("plot_codon_usage", use_pretty, seqs[0])
+    st.image(cf, caption="Codon usage (frame 0)")
 
 # ---------------------------
 # RNA folding (mid-weight)
 # ---------------------------
 if seqs:
-    with st.spinner("Folding RNA…"):
-        rna = dna_to_rna(seqs[0]).upper()
-        dot = nussinov(rna, min_loop=0)
-    st.write("RNA fold (dot-bracket):")
-    st.code(dot, language="text")
-    rf = work_dir / "rna_arcs.png"
-    plot_rna_arcs(rna, dot, str(rf))
-    st.image(str(rf), caption="RNA base-pair arcs")
+    rna = dna_to_rna(seqs[0]).upper()
+    dot = job_result("fold", "Folding RNA (diagonals)")
+    if dot is not None:
+        st.write("RNA fold (dot-bracket):")
+        st.code(dot, language="text")
+        rf = render("plot_rna_arcs", use_pretty, rna, dot)
+        st.image(rf, caption="RNA base-pair arcs")
 
 st.markdown("---")
 st.caption(
-    "Tip: If it still feels slow, subset your FASTA or raise the MSA limits incrementally."
+    "Tip: heavy steps keep running in the background; changing the input cancels them and starts over."
 )
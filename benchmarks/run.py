@@ -0,0 +1,200 @@
+# Benchmark suite: time every algorithm over a grid of simulated input sizes
+#
+#   python -m benchmarks.run run --grid quick --out benchmarks/results.json
+#   python -m benchmarks.run compare benchmarks/baseline.json benchmarks/results.json
+import argparse, json, os, platform, random, sys, tempfile, time, tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from src.simulate import simulate_family
+from src.io_utils import read_fasta, iter_fasta, write_fasta
+from src.translate import translate_dna
+from src.align import needleman_wunsch, smith_waterman, center_star_msa
+from src.distance import distance_matrix
+from src.tree import upgma, to_newick
+from src.rna_fold import nussinov
+from src.stats import composition
+
+GRIDS = {
+    # (pairwise/fold lengths, family sizes (n, length), record counts for FASTA I/O)
+    'quick': ([100, 200], [(5, 100), (10, 100)], [1000]),
+    'full': ([100, 300, 1000], [(5, 200), (20, 200), (50, 300)], [1000, 10000]),
+}
+
+def family(n: int, length: int, mu: float = 0.05) -> List[str]:
+    random.seed(n*100003 + length)
+    return list(simulate_family(n=n, length=length, mu=mu).values())[:n]
+
+def _random_matrix(n: int) -> List[List[float]]:
+    rng = random.Random(n)
+    D = [[0.0]*n for _ in range(n)]
+    for i in range(n):
+        for j in range(i+1, n):
+            D[i][j] = D[j][i] = rng.random()
+    return D
+
+def _fasta_file(records: int) -> str:
+    path = os.path.join(tempfile.mkdtemp(), 'bench.fasta')
+    write_fasta(path, {f"rec{i}": s for i, s in enumerate(family(records, 200, mu=0.2))})
+    return path
+
+def _names(n: int) -> List[str]:
+    return [f"t{i}" for i in range(n)]
+
+def cases(grid: str) -> List[Tuple[str, Dict, Callable[[], Callable], float, str]]:
+    """(name, params, setup, work units, unit label); setup() builds inputs and returns the timed callable."""
+    lengths, families, records = GRIDS[grid]
+    out = []
+    for L in lengths:
+        def nw(L=L):
+            a, b = family(2, L)
+            return lambda: needleman_wunsch(a, b)
+        def sw(L=L):
+            a, b = family(2, L)
+            return lambda: smith_waterman(a, b)
+        def fold(L=L):
+            rna = family(1, L)[0].replace('T', 'U')
+            return lambda: nussinov(rna)
+        def translate(L=L):
+            dna = family(1, L*1000)[0]
+            return lambda: translate_dna(dna, stop_behavior='keep')
+        def comp(L=L):
+            dna = family(1, L*1000)[0]
+            return lambda: composition('seq', dna)
+        out += [('needleman_wunsch', {'length': L}, nw, L*L, 'cells'),
+                ('smith_waterman', {'length': L}, sw, L*L, 'cells'),
+                ('nussinov', {'length': L}, fold, L, 'bases'),
+                ('translate_dna', {'length': L*1000}, translate, L*1000, 'bases'),
+                ('composition', {'length': L*1000}, comp, L*1000, 'bases')]
+    for n, L in families:
+        p = {'n': n, 'length': L}
+        def msa(n=n, L=L):
+            seqs = family(n, L)
+            return lambda: center_star_msa(seqs)
+        def dist(n=n, L=L):
+            seqs = family(n, L)
+            return lambda: distance_matrix(seqs, model='jc')
+        def tree(n=n*10):
+            D = _random_matrix(n)
+            return lambda: upgma(_names(n), D)
+        def newick(n=n*10):
+            root = upgma(_names(n), _random_matrix(n))
+            return lambda: to_newick(root)
+        out += [('center_star_msa', p, msa, n, 'seqs'),
+                ('distance_matrix', p, dist, n*(n-1)//2, 'pairs'),
+                ('upgma', {'n': n*10}, tree, n*10, 'taxa'),
+                ('to_newick', {'n': n*10}, newick, n*10, 'taxa')]
+    for r in records:
+        def rf(r=r):
+            path = _fasta_file(r)
+            return lambda: read_fasta(path)
+        def itf(r=r):
+            path = _fasta_file(r)
+            return lambda: sum(1 for _ in iter_fasta(path))
+        out += [('read_fasta', {'records': r}, rf, r, 'records'),
+                ('iter_fasta', {'records': r}, itf, r, 'records')]
+    return out + plot_cases(families)
+
+def plot_cases(families) -> List[Tuple]:
+    try:
+        from src import visualize
+    except ImportError:  # Matplotlib missing: skip plotting benchmarks
+        return []
+    out = []
+    for n, L in families:
+        p = {'n': n, 'length': L}
+        def gc(n=n, L=L):
+            recs = {f"s{i}": s for i, s in enumerate(family(n, L))}
+            return lambda: visualize.plot_gc_content(recs)
+        def codon(n=n, L=L):
+            seq = family(1, n*L)[0]
+            return lambda: visualize.plot_codon_usage(seq)
+        def aln(n=n, L=L):
+            msa = center_star_msa(family(n, L))
+            return lambda: visualize.plot_alignment(msa, _names(n))
+        def heat(n=n*10):
+            D = _random_matrix(n)
+            return lambda: visualize.plot_distance_heatmap(D, _names(n))
+        def arcs(n=n, L=L):
+            rna = family(1, n*L)[0].replace('T', 'U')
+            dot = nussinov(rna[:200]) + '.'*(len(rna)-200)
+            return lambda: visualize.plot_rna_arcs(rna, dot)
+        out += [('plot_gc_content', p, gc, n, 'seqs'),
+                ('plot_codon_usage', p, codon, n*L, 'bases'),
+                ('plot_alignment', p, aln, n*L, 'cells'),
+                ('plot_distance_heatmap', {'n': n*10}, heat, (n*10)**2, 'cells'),
+                ('plot_rna_arcs', {'length': n*L}, arcs, n*L, 'bases')]
+    return out
+
+def measure(setup: Callable[[], Callable], repeat: int) -> Tuple[float, float]:
+    """(best wall seconds over `repeat` runs, peak traced KiB of one run)."""
+    fn = setup()
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 1024
+
+def run(args):
+    results = []
+    for name, params, setup, units, unit in cases(args.grid):
+        if args.filter and args.filter not in name:
+            continue
+        secs, peak_kb = measure(setup, args.repeat)
+        results.append({'name': name, 'params': params, 'seconds': secs, 'peak_kb': round(peak_kb, 1),
+                        'throughput': units / secs if secs else None, 'unit': f"{unit}/s"})
+        print(f"{name:24s} {json.dumps(params):32s} {secs*1000:10.2f} ms  {peak_kb:10.1f} KiB  {units/secs if secs else 0:12.0f} {unit}/s")
+    doc = {'meta': {'grid': args.grid, 'python': sys.version.split()[0], 'platform': platform.platform(),
+                    'timestamp': datetime.now(timezone.utc).isoformat()},
+           'results': results}
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+
+def _key(r) -> str:
+    return f"{r['name']} {json.dumps(r['params'], sort_keys=True)}"
+
+def compare(args) -> int:
+    with open(args.baseline, encoding='utf-8') as f:
+        base = {_key(r): r for r in json.load(f)['results']}
+    with open(args.current, encoding='utf-8') as f:
+        cur = {_key(r): r for r in json.load(f)['results']}
+    regressions = 0
+    for key in sorted(base.keys() & cur.keys()):
+        ratio = cur[key]['seconds'] / base[key]['seconds'] if base[key]['seconds'] else float('inf')
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag, regressions = 'REGRESSION', regressions + 1
+        elif ratio < 1 - args.threshold:
+            flag = 'faster'
+        print(f"{key:56s} {base[key]['seconds']*1000:10.2f} -> {cur[key]['seconds']*1000:10.2f} ms  x{ratio:5.2f} {flag}")
+    for key in sorted(base.keys() - cur.keys()):
+        print(f"{key:56s} missing from current run")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog='benchmarks', description='Time algorithms over simulated input sizes')
+    sub = p.add_subparsers(required=True, dest='cmd')
+    r = sub.add_parser('run', help='Run the benchmark grid and write JSON')
+    r.add_argument('--grid', choices=sorted(GRIDS), default='quick')
+    r.add_argument('--out', default='benchmarks/results.json')
+    r.add_argument('--repeat', type=int, default=3, help='Timed runs per case (best is kept)')
+    r.add_argument('--filter', help='Only run cases whose name contains this text')
+    c = sub.add_parser('compare', help='Flag regressions against a stored baseline')
+    c.add_argument('baseline')
+    c.add_argument('current')
+    c.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown fraction')
+    args = p.parse_args(argv)
+    if args.cmd == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
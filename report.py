@@ -1,77 +1,161 @@
-
 import argparse, os
 from src.io_utils import read_fasta, write_fasta
 from src.translate import dna_to_rna, translate_dna
 from src.align import center_star_msa
-from src.distance import distance_matrix
+from src.distance import distance_matrix, msa_distance_matrix, jukes_cantor
 from src.tree import upgma, to_newick
 from src.rna_fold import nussinov
-from src.visualize import plot_gc_content, plot_codon_usage, plot_distance_heatmap, plot_alignment, plot_rna_arcs
+from src.bootstrap import bootstrap_support
+from src.pipeline import Stage, run_pipeline
+from src.stats import composition, write_table
 
-def generate_report(fasta: str, out_dir: str = "reports", rna_to_fold: str = None):
-    os.makedirs(out_dir, exist_ok=True)
-    recs = read_fasta(fasta)
-    names = list(recs.keys())
-    seqs = list(recs.values())
+# ---- Stages (module-level so worker processes can unpickle them) -------------
+# Plot stages import src.visualize themselves: Matplotlib only loads when a figure is drawn.
+PLOT_STAGES = ('gc_plot', 'msa_plot', 'heat_p', 'heat_jc', 'codon_plot', 'arcs')
 
-    fig_gc = os.path.join(out_dir, "gc_content.png")
-    plot_gc_content(recs, fig_gc)
+def _composition(recs, path):
+    rows = [composition(h, s) for h, s in recs.items()]
+    return rows + [write_table(path, rows)]
 
-    aln = center_star_msa(seqs)
-    fig_msa = os.path.join(out_dir, "msa_consensus_matches.png")
-    plot_alignment(aln, names, fig_msa)
+def _gc_plot(composition, path):
+    from src.visualize import plot_gc_content
+    plot_gc_content(composition, path)
 
-    Dp = distance_matrix(seqs, model='p')
-    fig_d_p = os.path.join(out_dir, "distance_p_heatmap.png")
-    plot_distance_heatmap(Dp, names, fig_d_p, title='p-distance Heatmap')
+def _msa(recs):
+    return center_star_msa(list(recs.values()))
 
-    Djc = distance_matrix(seqs, model='jc')
-    fig_d_jc = os.path.join(out_dir, "distance_jc_heatmap.png")
-    plot_distance_heatmap(Djc, names, fig_d_jc, title='Jukes-Cantor Distance Heatmap')
+def _msa_plot(msa, recs, path):
+    from src.visualize import plot_alignment
+    plot_alignment(msa, list(recs.keys()), path)
 
-    root = upgma(names, Djc)
+def _dist_p(recs):
+    return distance_matrix(list(recs.values()), model='p')
+
+def _dist_jc(dist_p):
+    # JC69 is a per-entry transform of p, so no second round of alignments
+    return [[jukes_cantor(p) if i != j else 0.0 for j, p in enumerate(row)] for i, row in enumerate(dist_p)]
+
+def _heat_p(dist_p, recs, path):
+    from src.visualize import plot_distance_heatmap
+    plot_distance_heatmap(dist_p, list(recs.keys()), path, title='p-distance Heatmap')
+
+def _heat_jc(dist_jc, recs, path):
+    from src.visualize import plot_distance_heatmap
+    plot_distance_heatmap(dist_jc, list(recs.keys()), path, title='Jukes-Cantor Distance Heatmap')
+
+def _tree(recs, dist_jc, msa, path, bootstrap, jobs):
+    names = list(recs.keys())
+    if bootstrap:
+        root = upgma(names, msa_distance_matrix(msa, model='jc'))
+        bootstrap_support(root, msa, names, replicates=bootstrap, model='jc', jobs=jobs)
+    else:
+        root = upgma(names, dist_jc)
     newick = to_newick(root) + ';'
-    with open(os.path.join(out_dir, "tree.newick"), "w", encoding="utf-8") as f:
+    with open(path, "w", encoding="utf-8") as f:
         f.write(newick + "\n")
 
-    fig_cu = os.path.join(out_dir, "codon_usage_first_seq.png")
-    plot_codon_usage(seqs[0], fig_cu)
+def _codon_plot(composition, path):
+    from src.visualize import plot_codon_usage
+    plot_codon_usage(composition[0], path)
 
-    if rna_to_fold is None:
-        rna = dna_to_rna(seqs[0])
-    else:
-        rna = rna_to_fold
-    dot = nussinov(rna, min_loop=0)
-    with open(os.path.join(out_dir, "rna_structure.txt"), "w", encoding="utf-8") as f:
-        f.write(rna + "\n" + dot + "\n")
-    fig_arcs = os.path.join(out_dir, "rna_arcs.png")
-    plot_rna_arcs(rna, dot, fig_arcs)
+def _fold(rna):
+    return nussinov(rna, min_loop=0)
+
+def _fold_write(fold, rna, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rna + "\n" + fold + "\n")
+
+def _arcs(fold, rna, path):
+    from src.visualize import plot_rna_arcs
+    plot_rna_arcs(rna, fold, path)
+
+def generate_report(fasta: str, out_dir: str = "reports", rna_to_fold: str = None,
+                    bootstrap: int = 0, jobs: int = 1, plots: bool = True):
+    """Run the report as a stage DAG on `jobs` processes. MSA, distances and the fold are cached
+    under out_dir/.cache, so reruns with other flags only recompute the stages they affect
+    (delete that directory after changing the code behind a cached stage).
+    With bootstrap, the tree stage runs alone in this process and gives its replicates all `jobs` workers.
+    plots=False skips every figure (and never imports Matplotlib) for a text-only report.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    recs = read_fasta(fasta)
+    seqs = list(recs.values())
+    rna = dna_to_rna(seqs[0]) if rna_to_fold is None else rna_to_fold
+
+    out = lambda name: os.path.join(out_dir, name)
+    fig_gc = out("gc_content.png")
+    fig_msa = out("msa_consensus_matches.png")
+    fig_d_p = out("distance_p_heatmap.png")
+    fig_d_jc = out("distance_jc_heatmap.png")
+    fig_cu = out("codon_usage_first_seq.png")
+    fig_arcs = out("rna_arcs.png")
+    stages = [
+        Stage('composition', _composition, ('recs',), {'path': out("composition.tsv")}),
+        Stage('gc_plot', _gc_plot, ('composition',), {'path': fig_gc}),
+        Stage('msa', _msa, ('recs',), persist=True),
+        Stage('msa_plot', _msa_plot, ('msa', 'recs'), {'path': fig_msa}),
+        Stage('dist_p', _dist_p, ('recs',), persist=True),
+        Stage('dist_jc', _dist_jc, ('dist_p',), persist=True),
+        Stage('heat_p', _heat_p, ('dist_p', 'recs'), {'path': fig_d_p}),
+        Stage('heat_jc', _heat_jc, ('dist_jc', 'recs'), {'path': fig_d_jc}),
+        Stage('tree', _tree, ('recs', 'dist_jc', 'msa'),
+              {'path': out("tree.newick"), 'bootstrap': bootstrap, 'jobs': jobs}, exclusive=bootstrap > 0),
+        Stage('codon_plot', _codon_plot, ('composition',), {'path': fig_cu}),
+        Stage('fold', _fold, (), {'rna': rna}, persist=True),
+        Stage('fold_write', _fold_write, ('fold',), {'rna': rna, 'path': out("rna_structure.txt")}),
+        Stage('arcs', _arcs, ('fold',), {'rna': rna, 'path': fig_arcs}),
+    ]
+    if not plots:
+        stages = [st for st in stages if st.name not in PLOT_STAGES]
+    results, runs = run_pipeline(stages, {'recs': recs}, jobs=jobs, cache_dir=out(".cache"))
+    aln = results['msa']
 
     md = os.path.join(out_dir, "report.md")
     with open(md, "w", encoding="utf-8") as f:
+        def img(alt, path):
+            if plots:
+                f.write(f"![{alt}]({os.path.basename(path)})\n\n")
         f.write(f"# Genetic Data Report\n\n")
         f.write(f"**Input FASTA:** `{fasta}`  \n")
         f.write(f"**Sequences loaded:** {len(seqs)}\n\n")
         f.write("## 1. Base Composition\n")
         f.write("We plot GC% per sequence because GC content influences stability and can hint at species or genomic regions with bias.\n\n")
-        f.write(f"![GC content]({os.path.basename(fig_gc)})\n\n")
+        total = results['composition'][-1]
+        f.write(f"**Overall GC:** {total.gc:.2f}%  \n")
+        f.write(f"**GC3 (third codon positions):** {total.gc3:.2f}%\n\n")
+        f.write("Per-record base, dinucleotide and codon counts: `composition.tsv`\n\n")
+        img("GC content", fig_gc)
         f.write("## 2. Multiple Sequence Alignment (MSA)\n")
         f.write("We create a simple center-star MSA and visualize consensus agreement per column.\n\n")
-        f.write(f"![MSA consensus]({os.path.basename(fig_msa)})\n\n")
+        f.write(f"**Columns:** {aln.n_cols}  \n")
+        f.write(f"**Mean gap fraction:** {aln.gap_fraction().mean():.3f}  \n")
+        f.write(f"**Mean column entropy:** {aln.entropy().mean():.3f} bits\n\n")
+        img("MSA consensus", fig_msa)
         f.write("## 3. Pairwise Distances & Evolutionary Model\n")
         f.write("We compute raw p-distances and Jukes–Cantor-corrected distances (JC69).\n\n")
-        f.write(f"![p-distance]({os.path.basename(fig_d_p)})\n\n")
-        f.write(f"![JC distance]({os.path.basename(fig_d_jc)})\n\n")
+        img("p-distance", fig_d_p)
+        img("JC distance", fig_d_jc)
         f.write("## 4. UPGMA Gene Tree\n")
-        f.write("We build an ultrametric UPGMA tree from JC69 distances and export Newick.\n\n")
+        if bootstrap:
+            f.write("We build an ultrametric UPGMA tree from JC69 distances read off the MSA columns of section 2 "
+                    "(not the pairwise distances in the heatmaps above, so the topology can differ) and export Newick.\n\n")
+            f.write(f"Internal node labels are bootstrap support (%) from {bootstrap} replicates over those MSA columns.\n\n")
+        else:
+            f.write("We build an ultrametric UPGMA tree from the JC69 distances above and export Newick.\n\n")
         f.write("**Newick:** `tree.newick`\n\n")
         f.write("## 5. Codon Usage\n")
         f.write("Codon usage bias can reflect expression or tRNA availability; we show counts for the first sequence (frame 0).\n\n")
-        f.write(f"![Codon usage]({os.path.basename(fig_cu)})\n\n")
+        img("Codon usage", fig_cu)
         f.write("## 6. RNA Secondary Structure (Nussinov)\n")
         f.write("We fold RNA and display dot-bracket and an arc diagram.\n\n")
         f.write("**Dot-bracket:** see `rna_structure.txt`  \n")
-        f.write(f"![RNA arcs]({os.path.basename(fig_arcs)})\n\n")
+        img("RNA arcs", fig_arcs)
+        f.write("## 7. Pipeline Timings\n")
+        f.write(f"Stages ran on up to {jobs} worker process(es); cached stages were loaded from `.cache/`.\n\n")
+        f.write("| Stage | Seconds | Status |\n|---|---:|---|\n")
+        for r in runs:
+            f.write(f"| {r.name} | {r.seconds:.3f} | {'cached' if r.cached else 'ran'} |\n")
+        f.write(f"\n**Total stage time:** {sum(r.seconds for r in runs):.3f} s\n")
         f.write("\n---\n*Generated by `report.py`.*\n")
 
 def main():
@@ -79,8 +163,13 @@ def main():
     ap.add_argument('--fasta', required=True, help='Input FASTA of related DNA sequences')
     ap.add_argument('--out_dir', default='reports', help='Output directory')
     ap.add_argument('--rna', help='Optional RNA string to fold instead of converting the first DNA')
+    ap.add_argument('--bootstrap', type=int, default=0, help='Bootstrap replicates for tree support values (the tree is then built from MSA-column distances)')
+    ap.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                    help='Worker processes for report stages (and bootstrap replicates)')
+    ap.add_argument('--no-plots', action='store_true', help='Text-only report: skip figures and Matplotlib')
     args = ap.parse_args()
-    generate_report(args.fasta, out_dir=args.out_dir, rna_to_fold=args.rna)
+    generate_report(args.fasta, out_dir=args.out_dir, rna_to_fold=args.rna,
+                    bootstrap=args.bootstrap, jobs=args.jobs, plots=not args.no_plots)
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,14 @@
-from typing import Tuple, List
+from typing import TYPE_CHECKING, Dict, Iterable, Tuple, List
+from collections import Counter
 from dataclasses import dataclass
+from itertools import groupby
+import math
+import re
+from bisect import bisect_left
+from .instrument import count, timed
+
+if TYPE_CHECKING:
+    from .msa import MSA
 
 @dataclass
 class Scoring:
@@ -7,9 +16,111 @@ class Scoring:
     mismatch: int = -1
     gap: int = -1
 
-def needleman_wunsch(a: str, b: str, scoring: Scoring = Scoring()) -> Tuple[str,str,int]:
-    """Global alignment."""
+_CIGAR_RE = re.compile(r'(\d+)([=XID])')
+
+class Alignment:
+    """Pairwise alignment stored as start coordinates, score and a run-length CIGAR.
+    Ops: '=' match, 'X' mismatch, 'I' base of `a` against a gap, 'D' gap against a base of `b`.
+    The gapped strings are built only when asked for; unpacking still gives (aligned_a, aligned_b, score).
+    """
+    __slots__ = ('a', 'b', 'score', 'a_start', 'b_start', 'cigar', 'matches', 'mismatches', 'gaps')
+
+    def __init__(self, a: str, b: str, score: int, a_start: int = 0, b_start: int = 0, cigar: str = '',
+                 matches: int = 0, mismatches: int = 0, gaps: int = 0):
+        self.a, self.b, self.score = a, b, score
+        self.a_start, self.b_start, self.cigar = a_start, b_start, cigar
+        self.matches, self.mismatches, self.gaps = matches, mismatches, gaps
+
+    @classmethod
+    def from_ops(cls, a: str, b: str, score: int, a_start: int, b_start: int, ops: Iterable[str]) -> 'Alignment':
+        """Build from per-column ops (as produced by a traceback)."""
+        return cls.from_runs(a, b, score, a_start, b_start, ((op, len(list(grp))) for op, grp in groupby(ops)))
+
+    @classmethod
+    def from_runs(cls, a: str, b: str, score: int, a_start: int, b_start: int,
+                  runs: Iterable[Tuple[str,int]]) -> 'Alignment':
+        """Build from (op, length) runs, merging neighbours and counting columns in one pass."""
+        merged: List[List] = []
+        counts = {'=': 0, 'X': 0, 'I': 0, 'D': 0}
+        for op, n in runs:
+            if n == 0:
+                continue
+            counts[op] += n
+            if merged and merged[-1][0] == op:
+                merged[-1][1] += n
+            else:
+                merged.append([op, n])
+        cigar = ''.join(f"{n}{op}" for op, n in merged)
+        return cls(a, b, score, a_start, b_start, cigar, counts['='], counts['X'], counts['I'] + counts['D'])
+
+    def runs(self) -> List[Tuple[str,int]]:
+        return [(op, int(n)) for n, op in _CIGAR_RE.findall(self.cigar)]
+
+    @property
+    def a_end(self) -> int:
+        return self.a_start + sum(n for op, n in self.runs() if op != 'D')
+
+    @property
+    def b_end(self) -> int:
+        return self.b_start + sum(n for op, n in self.runs() if op != 'I')
+
+    def gapped(self) -> Tuple[str,str]:
+        """Materialize the two gapped alignment rows."""
+        i, j = self.a_start, self.b_start
+        out_a, out_b = [], []
+        for op, n in self.runs():
+            if op == 'I':
+                out_a.append(self.a[i:i+n]); out_b.append('-'*n); i += n
+            elif op == 'D':
+                out_a.append('-'*n); out_b.append(self.b[j:j+n]); j += n
+            else:
+                out_a.append(self.a[i:i+n]); out_b.append(self.b[j:j+n]); i += n; j += n
+        return ''.join(out_a), ''.join(out_b)
+
+    @property
+    def aligned_a(self) -> str:
+        return self.gapped()[0]
+
+    @property
+    def aligned_b(self) -> str:
+        return self.gapped()[1]
+
+    def __iter__(self):
+        al_a, al_b = self.gapped()
+        return iter((al_a, al_b, self.score))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, idx):
+        if idx == 2 or idx == -1:
+            return self.score
+        return tuple(self)[idx]
+
+    def __eq__(self, other):
+        if isinstance(other, Alignment):
+            return tuple(self) == tuple(other)
+        return tuple(self) == other
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"Alignment(score={self.score}, a_start={self.a_start}, b_start={self.b_start}, cigar='{self.cigar}')"
+
+BAND_MARGIN = 8
+
+def needleman_wunsch(a: str, b: str, scoring: Scoring = Scoring(), band=None) -> Alignment:
+    """Global alignment.
+    band: None fills the full table; an int restricts DP to that many cells either side of the
+    corner-to-corner diagonal strip; 'auto' starts at BAND_MARGIN and doubles the band while the
+    optimal path touches its edge.
+    """
+    if band is not None:
+        return banded_needleman_wunsch(a, b, scoring, band)
     m, n = len(a), len(b)
+    count('alignments')
+    count('dp_cells', m*n)
     # DP matrices
     score = [[0]*(n+1) for _ in range(m+1)]
     ptr = [[None]*(n+1) for _ in range(m+1)]
@@ -34,101 +145,557 @@ def needleman_wunsch(a: str, b: str, scoring: Scoring = Scoring()) -> Tuple[str,
                 ptr[i][j] = 'L'
     # traceback
     i, j = m, n
-    al_a, al_b = [], []
+    ops = []
     while i>0 or j>0:
         p = ptr[i][j]
         if p == 'D':
-            al_a.append(a[i-1]); al_b.append(b[j-1])
+            ops.append('=' if a[i-1]==b[j-1] else 'X')
             i -= 1; j -= 1
         elif p == 'U':
-            al_a.append(a[i-1]); al_b.append('-')
+            ops.append('I')
             i -= 1
         else: # 'L'
-            al_a.append('-'); al_b.append(b[j-1])
+            ops.append('D')
             j -= 1
-    return ''.join(reversed(al_a)), ''.join(reversed(al_b)), score[m][n]
+    return Alignment.from_ops(a, b, score[m][n], 0, 0, reversed(ops))
 
-def smith_waterman(a: str, b: str, scoring: Scoring = Scoring()) -> Tuple[str,str,int]:
-    """Local alignment."""
+def banded_needleman_wunsch(a: str, b: str, scoring: Scoring = Scoring(), band='auto') -> Alignment:
+    """Global alignment over the diagonals min(0,n-m)-w <= j-i <= max(0,n-m)+w, O(max(m,n) * band)."""
     m, n = len(a), len(b)
-    score = [[0]*(n+1) for _ in range(m+1)]
-    ptr = [[None]*(n+1) for _ in range(m+1)]
+    count('alignments')
+    auto = band == 'auto'
+    w = BAND_MARGIN if auto else band
+    while True:
+        res, touched = _nw_band(a, b, scoring, w)
+        if not (auto and touched):
+            return res
+        w *= 2
+
+def _nw_band(a, b, scoring, w):
+    m, n = len(a), len(b)
+    lo_d, hi_d = min(0, n-m) - w, max(0, n-m) + w
+    full = lo_d <= -m and hi_d >= n  # band already spans the whole table
+    W = hi_d - lo_d + 1
+    count('dp_cells', m*W)
+    NEG = float('-inf')
+    gap = scoring.gap
+    # row i holds columns j = i+lo_d .. i+hi_d at offsets 0..W-1
+    prev = [NEG]*W
+    ptr = [[None]*W]
+    for j in range(0, min(n, hi_d)+1):
+        prev[j-lo_d] = j*gap
+        ptr[0][j-lo_d] = 'L'
+    for i in range(1, m+1):
+        cur = [NEG]*W
+        prow = [None]*W
+        for j in range(max(0, i+lo_d), min(n, i+hi_d)+1):
+            x = j - i - lo_d
+            if j == 0:
+                cur[x] = i*gap; prow[x] = 'U'
+                continue
+            diag = prev[x] + (scoring.match if a[i-1]==b[j-1] else scoring.mismatch)
+            up = prev[x+1] + gap if x+1 < W else NEG
+            left = cur[x-1] + gap if x > 0 else NEG
+            best = max(diag, up, left)
+            cur[x] = best
+            if best == diag:
+                prow[x] = 'D'
+            elif best == up:
+                prow[x] = 'U'
+            else:
+                prow[x] = 'L'
+        ptr.append(prow)
+        prev = cur
+    final = prev[n-m-lo_d]
+    # traceback, noting whether the path runs along the band edge
+    i, j = m, n
+    touched = False
+    ops = []
+    while i>0 or j>0:
+        x = j - i - lo_d
+        if not full and (x == 0 or x == W-1):
+            touched = True
+        p = ptr[i][x]
+        if p == 'D':
+            ops.append('=' if a[i-1]==b[j-1] else 'X')
+            i -= 1; j -= 1
+        elif p == 'U':
+            ops.append('I')
+            i -= 1
+        else: # 'L'
+            ops.append('D')
+            j -= 1
+    return Alignment.from_ops(a, b, int(final), 0, 0, reversed(ops)), touched
+
+def unique_anchors(a: str, b: str, k: int) -> List[Tuple[int,int]]:
+    """(pos_a, pos_b) of k-mers occurring exactly once in each sequence, sorted by pos_a."""
+    ca = Counter(a[i:i+k] for i in range(len(a)-k+1))
+    pos_b = {}
+    for j in range(len(b)-k+1):
+        km = b[j:j+k]
+        pos_b[km] = -1 if km in pos_b else j
+    return [(i, pos_b[a[i:i+k]]) for i in range(len(a)-k+1)
+            if ca[a[i:i+k]] == 1 and pos_b.get(a[i:i+k], -1) >= 0]
+
+def chain_anchors(anchors: List[Tuple[int,int]], k: int) -> List[Tuple[int,int,int]]:
+    """Longest collinear chain (LIS on pos_b), merged into exact-match runs (pos_a, pos_b, length)."""
+    tails, tail_idx, parent = [], [], [-1]*len(anchors)
+    for idx, (_, pb) in enumerate(anchors):
+        t = bisect_left(tails, pb)
+        if t == len(tails):
+            tails.append(pb); tail_idx.append(idx)
+        else:
+            tails[t] = pb; tail_idx[t] = idx
+        parent[idx] = tail_idx[t-1] if t > 0 else -1
+    chain = []
+    idx = tail_idx[-1] if tail_idx else -1
+    while idx >= 0:
+        chain.append(anchors[idx]); idx = parent[idx]
+    chain.reverse()
+    runs = []
+    for pa, pb in chain:
+        if runs:
+            ra, rb, ln = runs[-1]
+            if pa - ra == pb - rb and pa <= ra + ln:  # same diagonal, overlapping: extend
+                runs[-1] = (ra, rb, pa + k - ra)
+                continue
+            if pa < ra + ln or pb < rb + ln:  # crosses the previous run: drop
+                continue
+        runs.append((pa, pb, k))
+    return runs
+
+@timed('align_long')
+def align_long(a: str, b: str, scoring: Scoring = Scoring(), k: int = 21, min_k: int = 8,
+               max_cells: int = 4_000_000) -> Alignment:
+    """Global alignment for long sequences: chain unique shared k-mer anchors and run exact DP
+    only in the gaps between them. Gaps too large for DP are re-anchored with a smaller k.
+    """
+    if len(a)*len(b) <= max_cells or k < min_k:
+        return needleman_wunsch(a, b, scoring, band='auto' if len(a)*len(b) > max_cells else None)
+    runs = chain_anchors(unique_anchors(a, b, k), k)
+    if not runs:
+        return align_long(a, b, scoring, k=k//2, min_k=min_k, max_cells=max_cells)
+    pieces, total = [], 0
+    ea = eb = 0
+    for pa, pb, ln in runs + [(len(a), len(b), 0)]:
+        gap = align_long(a[ea:pa], b[eb:pb], scoring, k=k//2, min_k=min_k, max_cells=max_cells)
+        pieces.extend(gap.runs()); total += gap.score
+        pieces.append(('=', ln)); total += ln*scoring.match
+        ea, eb = pa + ln, pb + ln
+    return Alignment.from_runs(a, b, total, 0, 0, pieces)
+
+def smith_waterman(a: str, b: str, scoring: Scoring = Scoring(), band: int = None, diagonal: int = 0) -> Alignment:
+    """Local alignment; a_start/a_end and b_start/b_end give the aligned span (0-based, end-exclusive).
+    With `band`, only cells within `band` of the diagonal j - i == `diagonal` are filled.
+    """
+    m, n = len(a), len(b)
+    count('alignments')
+    count('dp_cells', m*n if band is None else m*min(n, 2*band+1))
+    match, mismatch, gap = scoring.match, scoring.mismatch, scoring.gap
+    # Row i stores column j at index j - base(i). Full table: base 0, width n+1. Banded: only the
+    # 2*band+1 diagonals (plus a zero cell either side) are stored, so memory is O(m * band).
+    if band is None:
+        width, base = n+1, lambda i: 0
+    else:
+        width, base = 2*band+3, lambda i: i+diagonal-band-1
+    score = [[0]*width for _ in range(m+1)]
+    ptr = [[None]*width for _ in range(m+1)]
     best_i, best_j, best_score = 0, 0, 0
     for i in range(1, m+1):
-        for j in range(1, n+1):
-            diag = score[i-1][j-1] + (scoring.match if a[i-1]==b[j-1] else scoring.mismatch)
-            up = score[i-1][j] + scoring.gap
-            left = score[i][j-1] + scoring.gap
+        if band is None:
+            lo, hi = 1, n
+        else:
+            lo, hi = max(1, i+diagonal-band), min(n, i+diagonal+band)
+        prev, cur, prow = score[i-1], score[i], ptr[i]
+        bi, bp = base(i), base(i-1)
+        ai = a[i-1]
+        for j in range(lo, hi+1):
+            x, px = j - bi, j - bp
+            diag = prev[px-1] + (match if ai==b[j-1] else mismatch)
+            up = prev[px] + gap
+            left = cur[x-1] + gap
             val = max(0, diag, up, left)
-            score[i][j] = val
+            cur[x] = val
             if val == 0:
-                ptr[i][j] = None
+                prow[x] = None
             elif val == diag:
-                ptr[i][j] = 'D'
+                prow[x] = 'D'
             elif val == up:
-                ptr[i][j] = 'U'
+                prow[x] = 'U'
             else:
-                ptr[i][j] = 'L'
+                prow[x] = 'L'
             if val > best_score:
                 best_score, best_i, best_j = val, i, j
     # traceback from best
     i, j = best_i, best_j
-    al_a, al_b = [], []
-    while i>0 and j>0 and score[i][j]>0:
-        p = ptr[i][j]
+    ops = []
+    while i>0 and j>0 and score[i][j-base(i)]>0:
+        p = ptr[i][j-base(i)]
         if p == 'D':
-            al_a.append(a[i-1]); al_b.append(b[j-1])
+            ops.append('=' if a[i-1]==b[j-1] else 'X')
             i -= 1; j -= 1
         elif p == 'U':
-            al_a.append(a[i-1]); al_b.append('-')
+            ops.append('I')
             i -= 1
         elif p == 'L':
-            al_a.append('-'); al_b.append(b[j-1])
+            ops.append('D')
             j -= 1
         else:
             break
-    return ''.join(reversed(al_a)), ''.join(reversed(al_b)), best_score
+    return Alignment.from_ops(a, b, best_score, i, j, reversed(ops))
 
-def center_star_msa(seqs: List[str]) -> List[str]:
-    """Very simple MSA: choose center that maximizes sum of pairwise global alignment scores,
-    then align others to the center and merge columns.
+def _xdrop_half(a: str, b: str, xdrop: int, scoring: Scoring) -> Tuple[int, int, int, List[str]]:
+    """Gapped X-drop extension of a and b from the cell before their first bases (no zero floor).
+    A cell more than `xdrop` below the best score so far is dead; each row only visits the window
+    between its first and last live cell (plus cells reached by gaps to the right), and the extension
+    stops when a row has no live cell. Returns (best score, i, j, ops from (i, j) back to the start).
+    """
+    match, mismatch, gap = scoring.match, scoring.mismatch, scoring.gap
+    m, n = len(a), len(b)
+    best, best_i, best_j = 0, 0, 0
+    prev = [0]
+    while len(prev) <= n and prev[-1] + gap >= -xdrop:
+        prev.append(prev[-1] + gap)
+    rows = [(0, [None] + ['L']*(len(prev)-1))]  # per row: (first live column, pointers)
+    lo, cells = 0, len(prev)
+    for i in range(1, m+1):
+        hi = lo + len(prev) - 1
+        floor = best - xdrop
+        ai = a[i-1]
+        cur, ptr = [], []
+        left = None
+        j = lo
+        while j <= n:
+            val, p = None, None
+            if lo < j <= hi+1 and prev[j-1-lo] is not None:
+                val, p = prev[j-1-lo] + (match if ai == b[j-1] else mismatch), 'D'
+            if j <= hi and prev[j-lo] is not None and (val is None or prev[j-lo] + gap > val):
+                val, p = prev[j-lo] + gap, 'U'
+            if left is not None and (val is None or left + gap > val):
+                val, p = left + gap, 'L'
+            if val is not None and val < floor:
+                val = None
+            if val is None and j > hi:
+                break
+            cur.append(val)
+            ptr.append(p)
+            left = val
+            j += 1
+        cells += len(cur)
+        first = next((x for x, v in enumerate(cur) if v is not None), None)
+        if first is None:
+            break
+        last = max(x for x, v in enumerate(cur) if v is not None)
+        cur, ptr, lo = cur[first:last+1], ptr[first:last+1], lo + first
+        for x, v in enumerate(cur):
+            if v is not None and v > best:
+                best, best_i, best_j = v, i, lo + x
+        rows.append((lo, ptr))
+        prev = cur
+    count('dp_cells', cells)
+    i, j = best_i, best_j
+    ops = []
+    while i > 0 or j > 0:
+        row_lo, row_ptr = rows[i]
+        p = row_ptr[j - row_lo]
+        if p == 'D':
+            ops.append('=' if a[i-1] == b[j-1] else 'X')
+            i -= 1; j -= 1
+        elif p == 'U':
+            ops.append('I')
+            i -= 1
+        else:
+            ops.append('D')
+            j -= 1
+    return best, best_i, best_j, ops
+
+def seed_point(a: str, b: str, k: int = 8, max_occ: int = 64):
+    """(i, j) in the middle of the median shared k-mer on the diagonal j - i with the most shared k-mers,
+    or None when there is none. k-mers occurring more than max_occ times in b are ignored.
+    """
+    pos_b: Dict[str, List[int]] = {}
+    for j in range(len(b)-k+1):
+        pos_b.setdefault(b[j:j+k], []).append(j)
+    hits: Dict[int, List[int]] = {}
+    for i in range(len(a)-k+1):
+        js = pos_b.get(a[i:i+k], ())
+        if len(js) <= max_occ:
+            for j in js:
+                hits.setdefault(j-i, []).append(i)
+    if not hits:
+        return None
+    d, starts = max(hits.items(), key=lambda kv: len(kv[1]))
+    i = starts[len(starts)//2] + k//2
+    return i, i + d
+
+@timed('xdrop_local')
+def xdrop_local(a: str, b: str, xdrop: int, scoring: Scoring = Scoring(), k: int = 8) -> Alignment:
+    """Seed-and-extend local alignment: gapped X-drop extension in both directions from seed_point(a, b, k).
+    Only cells within `xdrop` of the best score are visited, so near-identical pairs cost about
+    O(length * live band) instead of O(m * n). Finds the local match around the best-seeded diagonal,
+    not necessarily the global optimum; without a shared k-mer it falls back to smith_waterman.
+    """
+    seed = seed_point(a, b, k)
+    if seed is None:
+        return smith_waterman(a, b, scoring)
+    count('alignments')
+    si, sj = seed
+    fwd, fi, fj, fwd_ops = _xdrop_half(a[si:], b[sj:], xdrop, scoring)
+    back, bi, bj, back_ops = _xdrop_half(a[:si][::-1], b[:sj][::-1], xdrop, scoring)
+    # the reversed half's traceback already runs left to right in the original coordinates
+    return Alignment.from_ops(a, b, back + fwd, si - bi, sj - bj, back_ops + fwd_ops[::-1])
+
+def edit_distance(a: str, b: str, max_dist: int = None) -> int:
+    """Unit-cost Levenshtein distance via Myers' bit-vector algorithm (one Python int per column state).
+    With max_dist, returns max_dist + 1 as soon as the distance is known to exceed it.
+    """
+    m, n = len(a), len(b)
+    count('edit_distances')
+    if max_dist is not None and abs(m-n) > max_dist:
+        return max_dist + 1
+    if m == 0 or n == 0:
+        return max(m, n)
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m-1)
+    pv, mv, dist = mask, 0, m
+    for j, ch in enumerate(b):
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            dist += 1
+        elif mh & high:
+            dist -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        # each remaining column moves the distance by at most 1
+        if max_dist is not None and dist - (n-1-j) > max_dist:
+            return max_dist + 1
+    return dist if max_dist is None else min(dist, max_dist + 1)
+
+EDIT_BATCH_MIN = 64    # below this many pairs the per-column NumPy overhead loses to edit_distance
+EDIT_BATCH_MAX = 4096  # pairs per NumPy batch (bounds memory: ~40 bytes per pair per 64 pattern bases)
+
+@timed('edit_distances')
+def edit_distances(pairs: List[Tuple[str, str]], max_dist=None) -> List[int]:
+    """edit_distance for many pairs at once. Myers' bit-vectors for the whole batch are held in
+    (pairs x 64-bit words) NumPy arrays, so each text column costs a few dozen array operations
+    shared by every pair. max_dist is None, an int, or one bound per pair (same clamping as
+    edit_distance); pairs that finish or exceed their bound are dropped from the arrays as they go.
+    """
+    limits = [max_dist]*len(pairs) if max_dist is None or isinstance(max_dist, int) else list(max_dist)
+    if len(pairs) > EDIT_BATCH_MAX:
+        return [d for k in range(0, len(pairs), EDIT_BATCH_MAX)
+                for d in edit_distances(pairs[k:k+EDIT_BATCH_MAX], limits[k:k+EDIT_BATCH_MAX])]
+    if len(pairs) < EDIT_BATCH_MIN:
+        return [edit_distance(a, b, lim) for (a, b), lim in zip(pairs, limits)]
+    import numpy as np
+    count('edit_distances', len(pairs))
+    out = [0]*len(pairs)
+    todo = []
+    for k, ((a, b), lim) in enumerate(zip(pairs, limits)):
+        m, n = len(a), len(b)
+        if lim is not None and abs(m-n) > lim:
+            out[k] = lim + 1
+        elif m == 0 or n == 0:
+            out[k] = max(m, n) if lim is None else min(max(m, n), lim + 1)
+        else:
+            todo.append(k)
+    if not todo:
+        return out
+    enc = lambda seqs: np.frombuffer(''.join(seqs).encode('utf-32-le'), dtype=np.uint32)
+    A, B = [pairs[k][0] for k in todo], [pairs[k][1] for k in todo]
+    m, n = np.array([len(a) for a in A]), np.array([len(b) for b in B])
+    P, W, N = len(todo), (int(m.max()) + 63) // 64, int(n.max())
+    alphabet, a_codes = np.unique(enc(A), return_inverse=True)
+    S = len(alphabet)
+    one, top = np.uint64(1), np.uint64(63)
+    # State is word-major (W x pairs) so carry/shift slices along words stay contiguous.
+    # peq[w, c, p]: bit i set where pattern p has symbol c at 64*w + i; c == S: not in any pattern
+    grid = np.full((P, 64*W), S, np.intp)
+    grid[np.arange(64*W) < m[:, None]] = a_codes
+    peq = np.zeros((W, S+1, P), np.uint64)
+    for c in range(S):
+        peq[:, c, :] = np.packbits(grid == c, axis=1, bitorder='little').view('<u8').T
+    b_codes = enc(B)
+    c = np.searchsorted(alphabet, b_codes)
+    c[alphabet[np.minimum(c, S-1)] != b_codes] = S
+    text = np.full((P, N), S, np.intp)
+    text[np.arange(N) < n[:, None]] = c
+    text = np.ascontiguousarray(text.T)
+    lim = np.array([m[p] + n[p] if limits[k] is None else limits[k] for p, k in enumerate(todo)])
+    hb = one << ((m-1) & 63).astype(np.uint64)  # bit of the last pattern row within its word
+    dist, ids = m.copy(), np.array(todo)
+
+    def buffers(P):
+        cols = np.arange(P)
+        gather = text * P + cols  # column j of the text -> flat peq column per pair
+        high = ((m-1) >> 6) * P + cols  # flat index of the word holding the last pattern row
+        return peq.reshape(W, -1), gather, high, [np.empty((W, P), np.uint64) for _ in range(5)], np.empty((W, P), bool)
+    pv, mv = np.full((W, P), ~np.uint64(0)), np.zeros((W, P), np.uint64)
+    flat, gather, high, (eq, xv, s, ph, mh), carry = buffers(P)
+    for j in range(N):
+        np.take(flat, gather[j], axis=1, out=eq)
+        np.bitwise_or(eq, mv, out=xv)
+        np.bitwise_and(eq, pv, out=s)
+        np.add(s, pv, out=s)
+        np.less(s, pv, out=carry)
+        carry[-1] = False
+        while carry.any():  # ripple word carries upward
+            s[1:] += carry[:-1]
+            carry[1:] = carry[:-1] & (s[1:] == 0)
+            carry[0] = False
+        s ^= pv
+        s |= eq                                   # Xh
+        np.bitwise_or(s, pv, out=ph)
+        np.invert(ph, out=ph)
+        ph |= mv                                  # Ph
+        np.bitwise_and(pv, s, out=mh)             # Mh
+        up = (np.take(ph, high) & hb) != 0
+        down = ~up & ((np.take(mh, high) & hb) != 0)
+        if j >= n.min():
+            live = j < n
+            up &= live
+            down &= live
+        dist += up
+        dist -= down
+        if W > 1:
+            ph_top, mh_top = ph[:-1] >> top, mh[:-1] >> top
+        ph <<= one
+        mh <<= one
+        if W > 1:
+            ph[1:] |= ph_top
+            mh[1:] |= mh_top
+        ph[0] |= one
+        np.bitwise_or(xv, ph, out=pv)
+        np.invert(pv, out=pv)
+        pv |= mh
+        np.bitwise_and(ph, xv, out=mv)
+        if j % 32 == 31 or j == N-1:
+            # each remaining column moves the distance by at most 1
+            done = (n <= j+1) | (dist - (n-1-j) > lim)
+            if done.any():
+                for k, d, l in zip(ids[done], dist[done], lim[done]):
+                    out[k] = int(min(d, l + 1))
+                keep = ~done
+                if not keep.any():
+                    break
+                peq, text, pv, mv = peq[:, :, keep], text[:, keep], pv[:, keep], mv[:, keep]
+                dist, ids, n, lim, m, hb = dist[keep], ids[keep], n[keep], lim[keep], m[keep], hb[keep]
+                flat, gather, high, (eq, xv, s, ph, mh), carry = buffers(len(ids))
+    return out
+
+@timed('exact_center')
+def exact_center(seqs: List[str], band=None, progress=None) -> int:
+    """Index maximizing the sum of pairwise global alignment scores (O(n^2) alignments).
+    progress(done, total) is called after each alignment.
     """
-    if len(seqs) == 1:
-        return [seqs[0]]
-    # compute scores
     scores = [[0]*len(seqs) for _ in range(len(seqs))]
+    total, done = len(seqs)*(len(seqs)-1)//2, 0
     for i in range(len(seqs)):
         for j in range(i+1, len(seqs)):
-            _,_,s = needleman_wunsch(seqs[i], seqs[j])
+            s = needleman_wunsch(seqs[i], seqs[j], band=band).score
             scores[i][j] = scores[j][i] = s
-    center = max(range(len(seqs)), key=lambda i: sum(scores[i]))
-    # build MSA by aligning to center
-    aligned = [None]*len(seqs)
-    aligned[center] = seqs[center]
-    for i in range(len(seqs)):
-        if i == center:
-            continue
-        ac, si, _ = needleman_wunsch(aligned[center], seqs[i])
-        # merge gaps across all already-aligned sequences
-        # expand existing aligned sequences wherever 'ac' has gaps
-        def expand(s, template):
-            k = 0
-            out = []
-            for ch in template:
-                if ch == '-':
-                    out.append('-')
-                else:
-                    out.append(s[k]); k += 1
-            return ''.join(out)
-        # expand current center across template ac (which includes gaps)
-        if aligned[center] == seqs[center]:
-            aligned[center] = ac
-        else:
-            aligned[center] = expand(aligned[center].replace('-', ''), ac)
-        # now add the new sequence aligning with 'ac' vs 'si'
-        aligned[i] = si
-        # for every previously added sequence, expand to match the current center length
-        for j in range(len(seqs)):
-            if aligned[j] is not None and len(aligned[j]) < len(aligned[center]):
-                aligned[j] = expand(aligned[j].replace('-', ''), aligned[center])
-    return aligned
+            done += 1
+            if progress:
+                progress(done, total)
+    return max(range(len(seqs)), key=lambda i: sum(scores[i]))
+
+def kmer_profile(seq: str, k: int = 4) -> Dict[str, float]:
+    """Unit-length k-mer count vector of a sequence."""
+    counts = Counter(seq[i:i+k] for i in range(len(seq)-k+1))
+    norm = math.sqrt(sum(c*c for c in counts.values())) or 1.0
+    return {kmer: c/norm for kmer, c in counts.items()}
+
+@timed('kmer_center')
+def kmer_center(seqs: List[str], k: int = 4) -> int:
+    """Index maximizing the summed cosine similarity of k-mer profiles.
+    Summing every profile once gives sum_j cos(i, j) = <u_i, U> - 1, so this is O(n * profile).
+    """
+    profiles = [kmer_profile(s, k) for s in seqs]
+    total = Counter()
+    for prof in profiles:
+        total.update(prof)
+    sims = [sum(v*total[kmer] for kmer, v in prof.items()) for prof in profiles]
+    return max(range(len(seqs)), key=lambda i: sims[i])
+
+def center_agreement(families: List[List[str]], k: int = 4) -> Tuple[float, List[Tuple[int, int]]]:
+    """(fraction of families where the k-mer center equals the exact center, (exact, kmer) per family)."""
+    centers = [(exact_center(seqs), kmer_center(seqs, k)) for seqs in families]
+    hits = sum(1 for exact, approx in centers if exact == approx)
+    return (hits / len(families) if families else 0.0), centers
+
+def star_merge(center: str, pairs: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+    """Merge pairwise (center, other) alignments against the same ungapped center into MSA rows.
+    Each gap slot of the center (before each residue and after the last) gets the widest insertion
+    any pair has there; shorter insertions are left-justified and padded with '-'.
+    Returns (center row, other rows in `pairs` order).
+    """
+    L = len(center)
+    widths = [0]*(L+1)
+    split = []
+    for ac, si in pairs:
+        ins = [[] for _ in range(L+1)]  # residues of `si` inserted in each slot of the center
+        cols = []                       # what `si` has opposite each center residue
+        p = 0
+        for x, y in zip(ac, si):
+            if x == '-':
+                ins[p].append(y)
+            else:
+                cols.append(y)
+                p += 1
+        if p != L:
+            raise ValueError("pairwise alignment does not cover the center sequence")
+        for q in range(L+1):
+            widths[q] = max(widths[q], len(ins[q]))
+        split.append((ins, cols))
+
+    def row(ins, cols):
+        out = []
+        for q in range(L+1):
+            out.append(''.join(ins[q]).ljust(widths[q], '-'))
+            if q < L:
+                out.append(cols[q])
+        return ''.join(out)
+
+    return row([[]]*(L+1), center), [row(ins, cols) for ins, cols in split]
+
+@timed('center_star_msa')
+def center_star_msa(seqs: List[str], center: str = 'exact', k: int = 4, band=None, progress=None) -> 'MSA':
+    """Very simple MSA: choose center that maximizes sum of pairwise global alignment scores,
+    then align others to the center and merge columns.
+    center='kmer' picks the center from k-mer profile similarity instead, leaving only n-1 alignments.
+    band is passed to needleman_wunsch (None, an int, or 'auto').
+    progress(done, total) counts pairwise alignments (center search plus merges).
+    """
+    from .msa import MSA  # NumPy loads only when an MSA is actually built
+    if len(seqs) == 1:
+        return MSA([seqs[0]])
+    n = len(seqs)
+    done = n*(n-1)//2 if center != 'kmer' else 0
+    total = done + n - 1
+    if center == 'kmer':
+        center = kmer_center(seqs, k)
+    else:
+        center = exact_center(seqs, band=band, progress=(lambda d, _: progress(d, total)) if progress else None)
+    # align every other sequence to the ungapped center, then merge all pairs over one gap profile
+    others = [i for i in range(n) if i != center]
+    pairs = []
+    for i in others:
+        ac, si, _ = needleman_wunsch(seqs[center], seqs[i], band=band)
+        pairs.append((ac, si))
+        done += 1
+        if progress:
+            progress(done, total)
+    aligned = [None]*n
+    aligned[center], rows = star_merge(seqs[center], pairs)
+    for i, row in zip(others, rows):
+        aligned[i] = row
+    return MSA(aligned)
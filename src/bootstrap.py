@@ -0,0 +1,50 @@
+# Nonparametric bootstrap of UPGMA trees over MSA columns
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import numpy as np
+from .distance import msa_distance_matrix
+from .msa import MSA
+from .tree import Node, upgma, clades
+from .instrument import timed
+
+def resample_columns(aligned: MSA, rng: np.random.Generator) -> MSA:
+    """Draw alignment columns with replacement (a single fancy-index gather)."""
+    return aligned.take_columns(rng.integers(0, aligned.n_cols, aligned.n_cols))
+
+def _replicate_clades(aligned: MSA, names: List[str], model: str, seeds: List[int]) -> Counter:
+    counts = Counter()
+    for seed in seeds:
+        rep = resample_columns(aligned, np.random.default_rng(seed))
+        root = upgma(names, msa_distance_matrix(rep, model=model))
+        counts.update(clades(root))
+    return counts
+
+@timed('bootstrap_support')
+def bootstrap_support(root: Node, aligned, names: List[str], replicates: int = 100,
+                      model: str = 'jc', jobs: int = 1, seed: int = 42) -> Node:
+    """Annotate every internal node of `root` with the % of replicate trees containing its clade.
+    Replicates are split into `jobs` chunks and run across a process pool.
+    """
+    aligned = MSA.coerce(aligned)
+    if replicates <= 0 or aligned.n_cols == 0:
+        return root
+    seeds = [seed + r for r in range(replicates)]
+    jobs = max(1, min(jobs, replicates))
+    chunks = [seeds[k::jobs] for k in range(jobs)]
+    counts = Counter()
+    if jobs == 1:
+        counts = _replicate_clades(aligned, names, model, seeds)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = [ex.submit(_replicate_clades, aligned, names, model, c) for c in chunks]
+            for fut in futures:
+                counts.update(fut.result())
+    def annotate(nd):
+        if nd.left is None and nd.right is None:
+            return frozenset([nd.name])
+        leaves = annotate(nd.left) | annotate(nd.right)
+        nd.support = 100.0 * counts[leaves] / replicates
+        return leaves
+    annotate(root)
+    return root
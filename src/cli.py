@@ -1,47 +1,127 @@
 import argparse, sys, os
-from .translate import dna_to_rna, translate_dna
-from .io_utils import read_fasta, write_fasta
-from .align import needleman_wunsch, smith_waterman, center_star_msa
-from .distance import distance_matrix
-from .tree import upgma, to_newick
-from .rna_fold import nussinov
-from .simulate import simulate_family
+from . import instrument
+
+# Subcommand modules are imported inside each cmd_* so `translate` does not pay for NumPy,
+# the process pool or the search index; only argparse and instrument load up front.
+
+DEFAULT_SEARCH_K = 11
+
+def band_arg(value):
+    return value if value == 'auto' else int(value)
 
 def cmd_translate(args):
+    from .translate import dna_to_rna, translate_dna
     prot = translate_dna(args.dna, frame=args.frame, stop_behavior=args.stop)
     rna = dna_to_rna(args.dna)
     print("RNA:", rna)
     print("Protein:", prot)
 
 def cmd_fasta(args):
+    from .io_utils import read_fasta
     recs = read_fasta(args.fasta)
     print(f"Loaded {len(recs)} records:")
     for h, s in recs.items():
         print(f"- {h}: {len(s)} bp")
 
+def first_record(path):
+    from .io_utils import read_fasta
+    return next(iter(read_fasta(path).values()))
+
 def cmd_align(args):
+    from .align import needleman_wunsch, smith_waterman, align_long, xdrop_local
+    seq1 = first_record(args.fasta1) if args.fasta1 else args.seq1
+    seq2 = first_record(args.fasta2) if args.fasta2 else args.seq2
     if args.mode == 'global':
-        a,b,s = needleman_wunsch(args.seq1, args.seq2)
+        a,b,s = needleman_wunsch(seq1, seq2, band=args.band)
+    elif args.mode == 'long':
+        a,b,s = align_long(seq1, seq2, k=args.k)
+    elif args.xdrop is not None:
+        a,b,s = xdrop_local(seq1, seq2, args.xdrop)
     else:
-        a,b,s = smith_waterman(args.seq1, args.seq2)
+        a,b,s = smith_waterman(seq1, seq2)
     print(a)
     print(b)
     print("score:", s)
 
 def cmd_msa(args):
+    from .io_utils import read_fasta, write_fasta
+    from .align import center_star_msa
     recs = read_fasta(args.fasta)
     seqs = list(recs.values())
-    aln = center_star_msa(seqs)
+    aln = center_star_msa(seqs, center=args.center, k=args.k, band=args.band)
     out = {h: aln[i] for i, h in enumerate(recs.keys())}
     write_fasta(args.out, out)
     print(f"Wrote MSA to {args.out}")
 
+def cmd_center_check(args):
+    from .io_utils import read_fasta
+    from .align import center_agreement
+    rate, centers = center_agreement([list(read_fasta(path).values()) for path in args.fasta], args.k)
+    for path, (exact, approx) in zip(args.fasta, centers):
+        print(f"{path}: exact={exact} kmer={approx} {'match' if exact == approx else 'MISMATCH'}")
+    hits = sum(1 for exact, approx in centers if exact == approx)
+    print(f"agreement: {hits}/{len(args.fasta)} ({rate:.0%})")
+
+def cmd_search(args):
+    from .io_utils import read_fasta
+    from .search import KmerIndex
+    idx = None
+    if args.index and os.path.exists(args.index):
+        try:
+            idx = KmerIndex.load(args.index)
+            stale = idx.stale_reason(args.db, args.k)
+        except ValueError as e:
+            stale = str(e)
+        if stale and not args.db:
+            sys.exit(f"search: {args.index} is stale ({stale}); pass --db to rebuild it")
+        if stale:
+            print(f"Rebuilding {args.index}: {stale}")
+            idx = None
+    if idx is None:
+        if not args.db:
+            sys.exit("search: need --db or an existing --index")
+        idx = KmerIndex.from_fasta(args.db, k=args.k or DEFAULT_SEARCH_K)
+        if args.index:
+            if os.path.isfile(args.index):  # single-file pickle index from an older version
+                os.remove(args.index)
+            idx.save(args.index)
+            print(f"Wrote index to {args.index}")
+    if args.query_fasta:
+        queries = list(read_fasta(args.query_fasta).items())
+    else:
+        queries = [('query', args.query)]
+    for qname, q in queries:
+        for h in idx.search(q, top=args.top, band=args.band, min_seeds=args.min_seeds):
+            print(f"{qname}\t{h.name}\t{h.score}\t{h.q_start}-{h.q_end}\t{h.t_start}-{h.t_end}\tseeds={h.seeds}")
+
+def cmd_cluster(args):
+    from .io_utils import read_fasta
+    from .distance import threshold_clusters
+    recs = read_fasta(args.fasta)
+    names = list(recs.keys())
+    for k, members in enumerate(threshold_clusters(list(recs.values()), args.max_distance), 1):
+        print(f"cluster{k}\t" + ",".join(names[i] for i in members))
+
 def cmd_tree(args):
+    from .io_utils import read_fasta
+    from .distance import distance_matrix
+    from .tree import upgma, to_newick
     recs = read_fasta(args.fasta)
     names = list(recs.keys())
     seqs = list(recs.values())
-    D = distance_matrix(seqs, model=args.model)
-    root = upgma(names, D)
+    if args.bootstrap:
+        from .align import center_star_msa
+        from .distance import msa_distance_matrix
+        from .bootstrap import bootstrap_support
+        # support is only meaningful against a tree built from the same MSA columns, so with --bootstrap
+        # the reference tree uses center-star MSA distances instead of per-pair NW distances
+        aln = center_star_msa(seqs, band=args.band)
+        root = upgma(names, msa_distance_matrix(aln, model=args.model))
+        bootstrap_support(root, aln, names, replicates=args.bootstrap, model=args.model,
+                          jobs=args.jobs, seed=args.seed)
+    else:
+        D = distance_matrix(seqs, model=args.model, band=args.band)
+        root = upgma(names, D)
     newick = to_newick(root) + ";"
     if args.out:
         with open(args.out, 'w', encoding='utf-8') as f:
@@ -51,17 +131,35 @@ def cmd_tree(args):
         print(newick)
 
 def cmd_fold(args):
+    from .rna_fold import nussinov
     structure = nussinov(args.rna, min_loop=args.min_loop)
     print(args.rna)
     print(structure)
 
 def cmd_simulate(args):
+    from .io_utils import write_fasta
+    from .simulate import simulate_family
     fam = simulate_family(n=args.n, length=args.length, gc=args.gc, mu=args.mu)
     write_fasta(args.out, fam)
     print(f"Wrote simulated family to {args.out}")
 
+def cmd_stats(args):
+    from .stats import iter_compositions, write_table
+    rows = iter_compositions(args.fasta, jobs=args.jobs)
+    if not args.out:
+        write_table(sys.stdout, rows)
+        return
+    total = write_table(args.out, rows)
+    print(f"Wrote composition table to {args.out}: {total.length:,} bp, GC {total.gc:.2f}%, GC3 {total.gc3:.2f}%")
+
+def cmd_serve(args):
+    from .serve import serve
+    serve(sys.stdin, sys.stdout)
+
 def main(argv=None):
     p = argparse.ArgumentParser(prog='bio-portfolio', description='Beginner bioinformatics toolkit')
+    p.add_argument('--profile', action='store_true', help='Print per-stage timings and counters to stderr')
+    p.add_argument('--trace-json', metavar='PATH', help='Write a Chrome trace (chrome://tracing, Perfetto)')
     sub = p.add_subparsers(required=True)
 
     t = sub.add_parser('translate', help='Translate DNA → RNA → protein')
@@ -75,22 +173,64 @@ def main(argv=None):
     f.set_defaults(func=cmd_fasta)
 
     a = sub.add_parser('align', help='Pairwise alignment')
-    a.add_argument('--seq1', required=True)
-    a.add_argument('--seq2', required=True)
-    a.add_argument('--mode', choices=['global','local'], default='global')
+    s1 = a.add_mutually_exclusive_group(required=True)
+    s1.add_argument('--seq1')
+    s1.add_argument('--fasta1', help='FASTA whose first record is sequence 1')
+    s2 = a.add_mutually_exclusive_group(required=True)
+    s2.add_argument('--seq2')
+    s2.add_argument('--fasta2', help='FASTA whose first record is sequence 2')
+    a.add_argument('--mode', choices=['global','local','long'], default='global',
+                   help='long: anchor-chained global alignment for very long sequences')
+    a.add_argument('--k', type=int, default=21, help='Anchor k-mer size for --mode long')
+    a.add_argument('--band', type=band_arg, help='Banded global DP: band half-width or auto (default: full table)')
+    a.add_argument('--xdrop', type=int, help='Local mode: extend from the best shared 8-mer diagonal, '
+                   'dropping cells more than this below the best score (heuristic, much faster on similar pairs)')
     a.set_defaults(func=cmd_align)
 
     m = sub.add_parser('msa', help='Simple MSA (center-star)')
     m.add_argument('--fasta', required=True)
     m.add_argument('--out', required=True)
+    m.add_argument('--center', choices=['exact','kmer'], default='exact',
+                   help='Center selection: all-pairs alignment or k-mer profile similarity')
+    m.add_argument('--k', type=int, default=4)
+    m.add_argument('--band', type=band_arg, help='Banded global DP: band half-width or auto (default: full table)')
     m.set_defaults(func=cmd_msa)
 
+    cc = sub.add_parser('center-check', help='Compare k-mer vs exact MSA center on FASTA families')
+    cc.add_argument('--fasta', required=True, nargs='+')
+    cc.add_argument('--k', type=int, default=4)
+    cc.set_defaults(func=cmd_center_check)
+
+    se = sub.add_parser('search', help='Seed-and-extend local search against a FASTA database')
+    se.add_argument('--db', help='Database FASTA (indexed on the fly unless --index exists)')
+    se.add_argument('--index', help='Index file to load, or to write after building from --db')
+    q = se.add_mutually_exclusive_group(required=True)
+    q.add_argument('--query')
+    q.add_argument('--query-fasta')
+    se.add_argument('--k', type=int, help=f'Seed k-mer size (default {DEFAULT_SEARCH_K}, or the loaded index\'s k)')
+    se.add_argument('--band', type=int, default=16)
+    se.add_argument('--min-seeds', type=int, default=2)
+    se.add_argument('--top', type=int, default=10)
+    se.set_defaults(func=cmd_search)
+
     tr = sub.add_parser('tree', help='Build UPGMA tree and output Newick')
     tr.add_argument('--fasta', required=True)
     tr.add_argument('--model', choices=['p','jc'], default='jc')
     tr.add_argument('--out')
+    tr.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                    help='Bootstrap replicates over MSA columns (adds clade support to Newick). '
+                         'The tree is then built from center-star MSA distances instead of per-pair '
+                         'Needleman-Wunsch distances, so its topology can differ from the plain tree')
+    tr.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes for bootstrap')
+    tr.add_argument('--seed', type=int, default=42)
+    tr.add_argument('--band', type=band_arg, help='Banded global DP: band half-width or auto (default: full table)')
     tr.set_defaults(func=cmd_tree)
 
+    cl = sub.add_parser('cluster', help='Single-linkage clusters by edit-distance threshold')
+    cl.add_argument('--fasta', required=True)
+    cl.add_argument('--max-distance', type=float, default=0.1, help='Edit distance / length threshold')
+    cl.set_defaults(func=cmd_cluster)
+
     rf = sub.add_parser('fold', help='RNA folding (Nussinov)')
     rf.add_argument('--rna', required=True)
     rf.add_argument('--min_loop', type=int, default=0)
@@ -104,8 +244,28 @@ def main(argv=None):
     sim.add_argument('--mu', type=float, default=0.05)
     sim.set_defaults(func=cmd_simulate)
 
+    st = sub.add_parser('stats', help='Stream base/dinucleotide/codon composition of a FASTA into a TSV table')
+    st.add_argument('--fasta', required=True)
+    st.add_argument('--out', help='Table path (default: stdout); plots read it via src.stats.read_table')
+    st.add_argument('--jobs', type=int, default=1, help='Worker processes counting record batches')
+    st.set_defaults(func=cmd_stats)
+
+    sv = sub.add_parser('serve', help='Warm worker: JSON-lines requests (translate, align, fold) in, results out')
+    sv.add_argument('--stdio', action='store_true', required=True, help='Read requests from stdin, write to stdout')
+    sv.set_defaults(func=cmd_serve)
+
     args = p.parse_args(argv)
-    args.func(args)
+    if not (args.profile or args.trace_json):
+        args.func(args)
+        return
+    instrument.enable()
+    with instrument.stage(f"cmd:{args.func.__name__[4:]}"):
+        args.func(args)
+    if args.profile:
+        print(instrument.summary(), file=sys.stderr)
+    if args.trace_json:
+        instrument.write_chrome_trace(args.trace_json)
+        print(f"Wrote trace to {args.trace_json}", file=sys.stderr)
 
 if __name__ == '__main__':
     main()
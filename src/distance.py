@@ -1,10 +1,18 @@
 import math
-from typing import List
-from .align import needleman_wunsch
+from typing import List, Tuple
+from .align import needleman_wunsch, edit_distance, edit_distances, EDIT_BATCH_MAX
+from .instrument import timed
 
-def p_distance(a: str, b: str) -> float:
-    """Proportion of differing sites after global alignment."""
-    al_a, al_b, _ = needleman_wunsch(a, b)
+def p_distance(a: str, b: str, band=None) -> float:
+    """Proportion of differing sites after global alignment (band: see needleman_wunsch)."""
+    aln = needleman_wunsch(a, b, band=band)
+    comps = aln.matches + aln.mismatches
+    if comps == 0:
+        return 1.0
+    return aln.mismatches/comps
+
+def aligned_p_distance(al_a: str, al_b: str) -> float:
+    """p-distance of two already-aligned rows (gap columns are skipped)."""
     matches = sum(1 for x,y in zip(al_a, al_b) if x==y and x!='-' and y!='-')
     comps = sum(1 for x,y in zip(al_a, al_b) if x!='-' and y!='-')
     if comps == 0:
@@ -15,14 +23,76 @@ def jukes_cantor(p: float) -> float:
     """Estimate substitutions/site under JC69 from p-distance."""
     if p >= 0.75:
         return float('inf')
+    if p <= 0:
+        return 0.0  # not -0.0, which Newick output would print as "-0.0000"
     return -3/4 * math.log(1 - 4*p/3)
 
-def distance_matrix(seqs: List[str], model: str = 'p') -> List[List[float]]:
+def _edit_limit(a: str, b: str, max_ratio: float) -> int:
+    return int(max_ratio * max(len(a), len(b)))
+
+def within_edit_ratio(a: str, b: str, max_ratio: float) -> bool:
+    """Cheap screen: is the unit edit distance at most max_ratio * max(len(a), len(b))?"""
+    limit = _edit_limit(a, b, max_ratio)
+    return edit_distance(a, b, max_dist=limit) <= limit
+
+def within_edit_ratios(pairs: List[Tuple[str, str]], max_ratio: float) -> List[bool]:
+    """within_edit_ratio for many pairs, screened together by the batched edit_distances."""
+    limits = [_edit_limit(a, b, max_ratio) for a, b in pairs]
+    return [d <= lim for d, lim in zip(edit_distances(pairs, limits), limits)]
+
+@timed('distance_matrix')
+def distance_matrix(seqs: List[str], model: str = 'p', band=None, progress=None) -> List[List[float]]:
+    """Pairwise p or JC69 distances; progress(done, total) is called after each pair."""
     n = len(seqs)
     D = [[0.0]*n for _ in range(n)]
+    total, done = n*(n-1)//2, 0
     for i in range(n):
         for j in range(i+1, n):
-            p = p_distance(seqs[i], seqs[j])
+            p = p_distance(seqs[i], seqs[j], band=band)
             d = p if model=='p' else jukes_cantor(p)
             D[i][j] = D[j][i] = d
+            done += 1
+            if progress:
+                progress(done, total)
     return D
+
+@timed('msa_distance_matrix')
+def msa_distance_matrix(aligned, model: str = 'p') -> List[List[float]]:
+    """Distance matrix read straight off MSA rows (no realignment); accepts an MSA or List[str]."""
+    from .msa import MSA
+    P = MSA.coerce(aligned).p_distances()
+    if model == 'p':
+        return P.tolist()
+    return [[jukes_cantor(p) for p in row] for row in P.tolist()]
+
+@timed('threshold_clusters')
+def threshold_clusters(seqs: List[str], max_distance: float) -> List[List[int]]:
+    """Single-linkage clusters of sequence indices, linking pairs within_edit_ratio(max_distance).
+    The threshold is on edit distance / length, not on the NW p-distance: indels count as edits here
+    but are skipped by p_distance, so neither bounds the other.
+    """
+    parent = list(range(len(seqs)))
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    def screen(pairs):
+        for (i, j), close in zip(pairs, within_edit_ratios([(seqs[i], seqs[j]) for i, j in pairs], max_distance)):
+            ri, rj = find(i), find(j)
+            if close and ri != rj:
+                parent[rj] = ri
+    # pairs are screened in batches; pairs already joined when a batch is formed are skipped
+    pending = []
+    for i in range(len(seqs)):
+        for j in range(i+1, len(seqs)):
+            if find(i) != find(j):
+                pending.append((i, j))
+            if len(pending) >= EDIT_BATCH_MAX:
+                screen(pending)
+                pending = []
+    screen(pending)
+    groups = {}
+    for i in range(len(seqs)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
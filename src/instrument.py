@@ -0,0 +1,98 @@
+# Lightweight timing/counter instrumentation; a single flag check when disabled
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = False
+_events: List[Dict] = []
+counters: Counter = Counter()
+_NULL = contextlib.nullcontext()
+_T0 = time.perf_counter()
+
+def enable(on: bool = True):
+    global ENABLED
+    ENABLED = on
+
+def reset():
+    _events.clear()
+    counters.clear()
+
+def _peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KiB on Linux
+
+class _Stage:
+    __slots__ = ('name', 'wall', 'cpu')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _events.append({'name': self.name, 'start': self.wall - _T0, 'wall': end - self.wall,
+                        'cpu': time.process_time() - self.cpu, 'rss_kb': _peak_rss_kb(),
+                        'tid': threading.get_ident()})
+        return False
+
+def stage(name: str):
+    """Context manager timing a named stage (wall, CPU, peak RSS) when instrumentation is on."""
+    return _Stage(name) if ENABLED else _NULL
+
+def timed(name: str):
+    """Decorator form of stage() for whole functions."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def count(name: str, n: int = 1):
+    """Add n to a named counter (DP cells, alignments, records parsed, cache hits...)."""
+    if ENABLED:
+        counters[name] += n
+
+def summary() -> str:
+    agg: Dict[str, List[float]] = {}
+    for ev in _events:
+        a = agg.setdefault(ev['name'], [0, 0.0, 0.0, 0])
+        a[0] += 1; a[1] += ev['wall']; a[2] += ev['cpu']; a[3] = max(a[3], ev['rss_kb'])
+    lines = [f"{'stage':28s} {'calls':>7s} {'wall s':>10s} {'cpu s':>10s} {'peak RSS KiB':>13s}"]
+    for name, (calls, wall, cpu, rss) in sorted(agg.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"{name:28s} {calls:7d} {wall:10.4f} {cpu:10.4f} {rss:13d}")
+    if counters:
+        lines.append('')
+        lines += [f"{name:28s} {value:>12,}" for name, value in sorted(counters.items())]
+    return '\n'.join(lines)
+
+def write_chrome_trace(path: str):
+    """Write complete ('X') events plus final counters in Chrome trace format (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    events = [{'name': ev['name'], 'ph': 'X', 'pid': pid, 'tid': ev['tid'],
+               'ts': ev['start']*1e6, 'dur': ev['wall']*1e6,
+               'args': {'cpu_ms': ev['cpu']*1e3, 'peak_rss_kb': ev['rss_kb']}} for ev in _events]
+    end = max((ev['start'] + ev['wall'] for ev in _events), default=0.0)
+    events += [{'name': name, 'ph': 'C', 'pid': pid, 'ts': end*1e6, 'args': {name: value}}
+               for name, value in counters.items()]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
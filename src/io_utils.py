@@ -1,23 +1,30 @@
 from typing import Dict, List, Tuple, Iterable
+from .instrument import count, timed
 
+@timed('read_fasta')
 def read_fasta(path: str) -> Dict[str, str]:
     """Read a FASTA file into a dict {header: sequence}. Supports multiline sequences."""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_fasta(f)
+
+def parse_fasta(lines: Iterable[str]) -> Dict[str, str]:
+    """Parse FASTA text lines (an open file, str.splitlines(), an upload buffer...) into {header: sequence}."""
     records: Dict[str, List[str]] = {}
     current = None
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                current = line[1:].strip()
-                if current in records:
-                    raise ValueError(f"Duplicate FASTA header: {current}")
-                records[current] = []
-            else:
-                if current is None:
-                    raise ValueError("FASTA missing header before sequence lines")
-                records[current].append(line.upper())
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            current = line[1:].strip()
+            if current in records:
+                raise ValueError(f"Duplicate FASTA header: {current}")
+            records[current] = []
+        else:
+            if current is None:
+                raise ValueError("FASTA missing header before sequence lines")
+            records[current].append(line.upper())
+    count('records_parsed', len(records))
     return {h: "".join(seq) for h, seq in records.items()}
 
 def write_fasta(path: str, records: Dict[str, str], width: int = 80) -> None:
@@ -39,10 +46,12 @@ def iter_fasta(path: str) -> Iterable[Tuple[str, str]]:
                 continue
             if line.startswith(">"):
                 if header is not None:
+                    count('records_parsed')
                     yield header, "".join(chunks)
                 header = line[1:].strip()
                 chunks = []
             else:
                 chunks.append(line.upper())
         if header is not None:
+            count('records_parsed')
             yield header, "".join(chunks)
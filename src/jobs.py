@@ -0,0 +1,102 @@
+# Background jobs on a process pool, with progress reporting and cooperative cancellation
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import Any, Callable, Dict, Tuple
+
+class JobCancelled(Exception):
+    pass
+
+class _Reporter:
+    """progress(done, total) callback run inside the worker.
+    Writes to the shared dict (and checks for cancellation) at most every `interval` seconds.
+    """
+
+    def __init__(self, state, cancel, interval: float = 0.1):
+        self.state, self.cancel, self.interval = state, cancel, interval
+        self.last = 0.0
+
+    def __call__(self, done: int, total: int):
+        now = time.monotonic()
+        if now - self.last < self.interval and done < total:
+            return
+        self.last = now
+        self.state['done'], self.state['total'] = done, total
+        if self.cancel.is_set():
+            raise JobCancelled()
+
+def _run(fn, args, kwargs, state, cancel):
+    return fn(*args, progress=_Reporter(state, cancel), **kwargs)
+
+class Job:
+    def __init__(self, future, state, cancel):
+        self.future, self.state, self.cancel_event = future, state, cancel
+        self.touched = time.monotonic()
+
+    def progress(self) -> Tuple[int, int]:
+        return self.state.get('done', 0), self.state.get('total', 0)
+
+    def fraction(self) -> float:
+        done, total = self.progress()
+        return done/total if total else 0.0
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancelled(self) -> bool:
+        if self.future.cancelled():
+            return True
+        return self.future.done() and isinstance(self.future.exception(), JobCancelled)
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def result(self, timeout: float = None) -> Any:
+        return self.future.result(timeout)
+
+class JobRunner:
+    """Submit functions that accept a `progress(done, total)` keyword to a process pool."""
+
+    def __init__(self, max_workers: int = None):
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.manager = Manager()
+        self.jobs: Dict[str, Job] = {}
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> Job:
+        """Start `fn` as job `name`, cancelling any job already running under that name."""
+        if name in self.jobs:
+            self.jobs[name].cancel()
+        state, cancel = self.manager.dict(), self.manager.Event()
+        job = Job(self.pool.submit(_run, fn, args, kwargs, state, cancel), state, cancel)
+        self.jobs[name] = job
+        return job
+
+    def get(self, name: str) -> Job:
+        job = self.jobs.get(name)
+        if job is not None:
+            job.touched = time.monotonic()
+        return job
+
+    def pop(self, name: str) -> Job:
+        """Forget job `name` (e.g. once its result has been collected) and return it."""
+        return self.jobs.pop(name, None)
+
+    def prune(self, idle: float) -> int:
+        """Cancel and forget jobs nobody has looked up for `idle` seconds (abandoned sessions); returns how many."""
+        cutoff = time.monotonic() - idle
+        stale = [name for name, job in self.jobs.items() if job.touched < cutoff]
+        for name in stale:
+            self.jobs.pop(name).cancel()
+        return len(stale)
+
+    def cancel_all(self):
+        for job in self.jobs.values():
+            job.cancel()
+        self.jobs.clear()
+
+    def shutdown(self):
+        self.cancel_all()
+        # running jobs stop at their next progress check; wait so no worker still holds a manager proxy
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.manager.shutdown()
@@ -0,0 +1,117 @@
+# Multiple sequence alignment stored as an (n_seqs x n_cols) uint8 matrix
+from typing import List, Sequence, Union
+import numpy as np
+
+GAP = ord('-')
+
+class MSA:
+    """Aligned rows as a column-major uint8 matrix (ASCII codes).
+    Indexing and iteration give row strings, so it can stand in for the old List[str].
+    """
+
+    def __init__(self, rows: Sequence[str]):
+        rows = list(rows)
+        cols = len(rows[0]) if rows else 0
+        if any(len(r) != cols for r in rows):
+            raise ValueError("MSA rows must all have the same length")
+        flat = np.frombuffer(''.join(rows).encode('ascii'), dtype=np.uint8)
+        self.array = np.asfortranarray(flat.reshape(len(rows), cols))
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'MSA':
+        msa = cls.__new__(cls)
+        msa.array = np.asfortranarray(array, dtype=np.uint8)
+        return msa
+
+    @classmethod
+    def coerce(cls, aligned: Union['MSA', Sequence[str]]) -> 'MSA':
+        return aligned if isinstance(aligned, MSA) else cls(aligned)
+
+    @property
+    def n_seqs(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def n_cols(self) -> int:
+        return self.array.shape[1]
+
+    def __len__(self):
+        return self.n_seqs
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self.n_seqs))]
+        return self.array[i].tobytes().decode('ascii')
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n_seqs))
+
+    def __eq__(self, other):
+        if isinstance(other, MSA):
+            return np.array_equal(self.array, other.array)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MSA(n_seqs={self.n_seqs}, n_cols={self.n_cols})"
+
+    def take_columns(self, idx) -> 'MSA':
+        """New MSA from the given column indices (e.g. a bootstrap resample)."""
+        return MSA.from_array(self.array[:, idx])
+
+    def counts(self) -> np.ndarray:
+        """(n_cols x 256) symbol counts per column, indexed by ASCII code."""
+        offsets = self.array + (np.arange(self.n_cols, dtype=np.int64) * 256)[None, :]
+        return np.bincount(offsets.ravel(), minlength=256*self.n_cols).reshape(self.n_cols, 256)
+
+    def consensus(self) -> str:
+        """Most frequent non-gap symbol per column ('-' for all-gap columns)."""
+        counts = self.counts()
+        counts[:, GAP] = 0
+        best = counts.argmax(axis=1).astype(np.uint8)
+        best[counts.max(axis=1) == 0] = GAP
+        return best.tobytes().decode('ascii')
+
+    def gap_fraction(self) -> np.ndarray:
+        return (self.array == GAP).mean(axis=0)
+
+    def entropy(self) -> np.ndarray:
+        """Shannon entropy (bits) of the non-gap symbols in each column."""
+        counts = self.counts().astype(float)
+        counts[:, GAP] = 0
+        totals = counts.sum(axis=1, keepdims=True)
+        freqs = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where(freqs > 0, freqs * np.log2(freqs), 0.0)
+        return -terms.sum(axis=1)
+
+    def match_matrix(self) -> np.ndarray:
+        """1 where a residue equals its column consensus, else 0."""
+        cons = np.frombuffer(self.consensus().encode('ascii'), dtype=np.uint8)
+        return ((self.array == cons[None, :]) & (self.array != GAP)).astype(np.uint8)
+
+    def pairwise_identity(self) -> np.ndarray:
+        """(n x n) identical / comparable (both non-gap) columns; NaN where nothing is comparable."""
+        present = (self.array != GAP).astype(np.float64)
+        comparable = present @ present.T
+        identical = np.zeros_like(comparable)
+        for sym in np.unique(self.array):
+            if sym == GAP:
+                continue
+            hit = (self.array == sym).astype(np.float64)
+            identical += hit @ hit.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(comparable > 0, identical / comparable, np.nan)
+
+    def p_distances(self) -> np.ndarray:
+        """1 - identity, with 1.0 for pairs sharing no comparable column (as aligned_p_distance)."""
+        d = 1.0 - self.pairwise_identity()
+        d[np.isnan(d)] = 1.0
+        np.fill_diagonal(d, 0.0)
+        return d
+
+    def to_list(self) -> List[str]:
+        return list(self)
@@ -0,0 +1,110 @@
+# Tiny dependency-aware stage runner with on-disk caching of selected stage results
+import hashlib
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+from .instrument import count
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable          # called as fn(**{dep: result}, **params); must be picklable for jobs > 1
+    deps: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    persist: bool = False  # cache the result under cache_dir, keyed by version + params + upstream keys
+    version: int = 1       # bump when fn's output changes for the same inputs, so old cache entries miss
+    exclusive: bool = False  # run in this process once no other stage is running (stages with their own pool)
+
+@dataclass
+class StageRun:
+    name: str
+    seconds: float
+    cached: bool
+
+def _digest(value) -> str:
+    return hashlib.sha256(pickle.dumps(value, protocol=4)).hexdigest()
+
+def _timed(fn, kwargs):
+    t0 = time.perf_counter()
+    out = fn(**kwargs)
+    return out, time.perf_counter() - t0
+
+def stage_keys(stages: List[Stage], inputs: Dict[str, Any]) -> Dict[str, str]:
+    """Cache key per stage: hash of its name, version, params and the keys of everything upstream.
+    Code changes are not detected: bump the stage's version, or delete the cache directory.
+    """
+    keys = {name: _digest(value) for name, value in inputs.items()}
+    remaining = list(stages)
+    while remaining:
+        progressed = False
+        for st in list(remaining):
+            if all(d in keys for d in st.deps):
+                parts = [st.name, f"v{st.version}", repr(sorted(st.params.items()))] + [keys[d] for d in st.deps]
+                keys[st.name] = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+                remaining.remove(st)
+                progressed = True
+        if not progressed:
+            raise ValueError(f"Unresolvable stage dependencies: {[s.name for s in remaining]}")
+    return keys
+
+def run_pipeline(stages: List[Stage], inputs: Dict[str, Any], jobs: int = 1,
+                 cache_dir: str = None) -> Tuple[Dict[str, Any], List[StageRun]]:
+    """Run stages as soon as their dependencies finish, on up to `jobs` worker processes.
+    Exclusive stages wait for the pool to go idle and run in this process, so they can use all `jobs` CPUs.
+    Returns (results by stage/input name, per-stage timings in completion order).
+    """
+    keys = stage_keys(stages, inputs)
+    results = dict(inputs)
+    runs: List[StageRun] = []
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(st):
+        return os.path.join(cache_dir, f"{st.name}-{keys[st.name][:16]}.pkl")
+
+    def finish(st, out, seconds, cached=False):
+        results[st.name] = out
+        runs.append(StageRun(st.name, seconds, cached))
+        if st.persist and cache_dir and not cached:
+            with open(cache_path(st), 'wb') as f:
+                pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_cached(st):
+        if st.persist and cache_dir and os.path.exists(cache_path(st)):
+            with open(cache_path(st), 'rb') as f:
+                finish(st, pickle.load(f), 0.0, cached=True)
+            count('cache_hits')
+            return True
+        return False
+
+    todo = list(stages)
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    running = {}
+    try:
+        while todo or running:
+            for st in [s for s in todo if all(d in results for d in s.deps)]:
+                if st.exclusive and running:
+                    continue
+                todo.remove(st)
+                if load_cached(st):
+                    continue
+                kwargs = {d: results[d] for d in st.deps}
+                kwargs.update(st.params)
+                if pool is None or st.exclusive:
+                    finish(st, *_timed(st.fn, kwargs))
+                else:
+                    running[pool.submit(_timed, st.fn, kwargs)] = st
+            if not running:
+                if todo and not any(all(d in results for d in s.deps) for s in todo):
+                    raise ValueError(f"Unresolvable stage dependencies: {[s.name for s in todo]}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                finish(running.pop(fut), *fut.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return results, runs
@@ -0,0 +1,56 @@
+# Shared helpers that keep figure size and draw cost bounded for large inputs
+from typing import List, Sequence, Tuple
+import numpy as np
+
+MAX_CELLS = 1200    # max matrix cells drawn per axis (aggregate beyond this)
+TICK_LIMIT = 60     # label each row/column only up to this many items
+BASE_TICK_LIMIT = 150  # per-base letters along an arc diagram
+MAX_FIG_INCHES = 24
+ARC_POINTS = 64
+
+# unit semicircle from (1, 0) to (-1, 0); every arc is a scaled, shifted copy
+_UNIT_ARC = np.stack([np.cos(np.linspace(0, np.pi, ARC_POINTS + 1)),
+                      np.sin(np.linspace(0, np.pi, ARC_POINTS + 1))], axis=1)
+
+def fig_dim(n: int, per_item: float, minimum: float) -> float:
+    """Figure dimension that grows with n but stays within [minimum, MAX_FIG_INCHES]."""
+    return min(MAX_FIG_INCHES, max(minimum, n*per_item))
+
+def _edges(n: int, limit: int) -> np.ndarray:
+    if n <= limit:
+        return np.arange(n + 1)
+    return np.unique(np.linspace(0, n, limit + 1).astype(int))
+
+def block_mean(mat, max_rows: int = MAX_CELLS, max_cols: int = MAX_CELLS) -> np.ndarray:
+    """Average a matrix over contiguous blocks so it is at most max_rows x max_cols."""
+    mat = np.asarray(mat, dtype=float)
+    if mat.size == 0 or (mat.shape[0] <= max_rows and mat.shape[1] <= max_cols):
+        return mat
+    re, ce = _edges(mat.shape[0], max_rows), _edges(mat.shape[1], max_cols)
+    sums = np.add.reduceat(np.add.reduceat(mat, re[:-1], axis=0), ce[:-1], axis=1)
+    return sums / np.outer(np.diff(re), np.diff(ce))
+
+def label_ticks(set_ticks, labels: Sequence[str], offset: float = 0.0, limit: int = TICK_LIMIT, **kw):
+    """Per-item tick labels (plt.xticks/plt.yticks) for small inputs; Matplotlib's default locator above limit."""
+    if len(labels) <= limit:
+        set_ticks(np.arange(len(labels)) + offset, labels, **kw)
+
+def arc_segments(pairs: List[Tuple[int, int]]) -> np.ndarray:
+    """(n_pairs, ARC_POINTS+1, 2) semicircle polylines for a LineCollection."""
+    if not pairs:
+        return np.zeros((0, ARC_POINTS + 1, 2))
+    p = np.asarray(pairs, dtype=float)
+    cx = (p[:, 0] + p[:, 1]) / 2
+    r = (p[:, 1] - p[:, 0]) / 2
+    seg = _UNIT_ARC[None, :, :] * r[:, None, None]
+    seg[:, :, 0] += cx[:, None]
+    return seg
+
+def dot_bracket_pairs(dot_bracket: str) -> List[Tuple[int, int]]:
+    pairs, stack = [], []
+    for i, ch in enumerate(dot_bracket):
+        if ch == '(':
+            stack.append(i)
+        elif ch == ')' and stack:
+            pairs.append((stack.pop(), i))
+    return pairs
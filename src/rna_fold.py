@@ -1,12 +1,16 @@
 # Nussinov algorithm for RNA secondary structure (max base pairs)
 from typing import List, Tuple
+from .instrument import count, timed
 
 def can_pair(a: str, b: str) -> bool:
     pairs = {('A','U'),('U','A'),('G','C'),('C','G'),('G','U'),('U','G')}
     return (a,b) in pairs
 
-def nussinov(rna: str, min_loop: int = 0) -> str:
+@timed('nussinov')
+def nussinov(rna: str, min_loop: int = 0, progress=None) -> str:
+    """Dot-bracket structure maximizing base pairs; progress(done, total) is called per DP diagonal."""
     n = len(rna)
+    count('dp_cells', n*(n-1)//2)
     dp = [[0]*n for _ in range(n)]
     bt = [[None]*n for _ in range(n)]
     for k in range(1, n):
@@ -27,6 +31,8 @@ def nussinov(rna: str, min_loop: int = 0) -> str:
                     best = score; choice = ('split', i, t, t+1, j)
             dp[i][j] = best
             bt[i][j] = choice
+        if progress:
+            progress(k, n-1)
     # traceback to dot-bracket
     res = ['.']*n
     def tb(i,j):
@@ -0,0 +1,195 @@
+# Seed-and-extend search: 2-bit k-mer index over a FASTA (NumPy, memory-mapped on disk),
+# banded Smith-Waterman around seed diagonals
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .io_utils import iter_fasta
+from .align import Scoring, smith_waterman
+from .instrument import timed
+
+@dataclass
+class Hit:
+    name: str
+    score: int
+    q_start: int
+    q_end: int
+    t_start: int
+    t_end: int
+    seeds: int
+
+INDEX_FORMAT = 1
+# A/C/G/T(U) in either case -> 0..3; anything else -> 4 (k-mers containing it are not indexed)
+_CODES = bytes('ACGT'.index(chr(c).upper().replace('U', 'T')) if chr(c) in 'ACGTUacgtu' else 4 for c in range(256))
+_ARRAYS = ('codes', 'recs', 'pos', 'seq', 'offsets')
+
+def _fingerprint(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+def kmer_codes(seq: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(2-bit packed code of every k-mer start, mask of k-mers made only of A/C/G/T)."""
+    c = np.frombuffer(seq.encode('ascii', 'replace').translate(_CODES), dtype=np.uint8)
+    n = len(c) - k + 1
+    if n <= 0:
+        return np.zeros(0, np.uint64), np.zeros(0, bool)
+    bad = np.concatenate(([0], np.cumsum(c > 3)))
+    c2 = np.minimum(c, 3).astype(np.uint64)
+    codes = np.zeros(n, np.uint64)
+    for t in range(k):
+        codes = (codes << np.uint64(2)) | c2[t:t+n]
+    return codes, bad[k:] - bad[:n] == 0
+
+class KmerIndex:
+    """Every A/C/G/T k-mer of a database as sorted NumPy arrays: 2-bit packed `codes` with the matching
+    `recs` and `pos` of each occurrence. Seeds are looked up with searchsorted, and a saved index is
+    a directory of .npy files that load() memory-maps, so opening it costs no parsing.
+    """
+
+    def __init__(self, k: int = 11):
+        if not 1 <= k <= 31:
+            raise ValueError(f"k must be between 1 and 31 (2-bit codes in 64 bits), not {k}")
+        self.k = k
+        self.names: List[str] = []
+        self.source: Optional[Tuple[str, int, int]] = None  # (abs path, mtime_ns, size) of the database FASTA
+        empty = np.zeros(0, np.uint64), np.zeros(0, np.uint32), np.zeros(0, np.uint32)
+        self.codes, self.recs, self.pos = empty
+        self.seq_bytes, self.offsets = np.zeros(0, np.uint8), np.zeros(1, np.int64)
+        self._added: List[Tuple[np.ndarray, np.ndarray, str]] = []  # records not yet merged into the arrays
+
+    def add(self, name: str, seq: str):
+        codes, ok = kmer_codes(seq, self.k)
+        pos = np.flatnonzero(ok).astype(np.uint32)
+        self._added.append((codes[ok], pos, seq))
+        self.names.append(name)
+
+    def _merge(self):
+        """Fold added records into the sorted arrays (a stable sort keeps occurrences in (rec, pos) order)."""
+        if not self._added:
+            return
+        first = len(self.offsets) - 1
+        codes = [self.codes] + [c for c, _, _ in self._added]
+        recs = [self.recs] + [np.full(len(c), first+r, np.uint32) for r, (c, _, _) in enumerate(self._added)]
+        pos = [self.pos] + [p for _, p, _ in self._added]
+        order = np.argsort(np.concatenate(codes), kind='stable')
+        self.codes = np.concatenate(codes)[order]
+        self.recs, self.pos = np.concatenate(recs)[order], np.concatenate(pos)[order]
+        raw = [s.encode('ascii', 'replace') for _, _, s in self._added]
+        self.seq_bytes = np.concatenate([self.seq_bytes] + [np.frombuffer(r, np.uint8) for r in raw])
+        self.offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum([len(r) for r in raw])])
+        self._added = []
+
+    def seq(self, rec: int) -> str:
+        self._merge()
+        return self.seq_bytes[self.offsets[rec]:self.offsets[rec+1]].tobytes().decode('ascii')
+
+    @classmethod
+    @timed('kmer_index_build')
+    def from_fasta(cls, path: str, k: int = 11) -> 'KmerIndex':
+        idx = cls(k)
+        for name, seq in iter_fasta(path):
+            idx.add(name, seq)
+        idx._merge()
+        idx.source = _fingerprint(path)
+        return idx
+
+    def stale_reason(self, db: str = None, k: int = None) -> Optional[str]:
+        """Why this index does not match the requested database / k (None when it does)."""
+        if k is not None and k != self.k:
+            return f"built with k={self.k}, not k={k}"
+        if db is not None:
+            if self.source is None or self.source[0] != os.path.abspath(db):
+                return f"built from {self.source[0] if self.source else 'an unknown database'}, not {db}"
+            if self.source != _fingerprint(db):
+                return f"{db} changed since it was indexed"
+        return None
+
+    def save(self, path: str):
+        """Write the index as a directory of .npy arrays plus meta.json (names, k, source)."""
+        self._merge()
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, 'seq_bytes' if name == 'seq' else name))
+        meta = {'format': INDEX_FORMAT, 'k': self.k, 'names': self.names,
+                'source': list(self.source) if self.source else None}
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'KmerIndex':
+        """Open a saved index; the arrays are memory-mapped, not read."""
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (NotADirectoryError, FileNotFoundError):
+            raise ValueError(f"{path} is not a k-mer index directory (indexes from older versions must be rebuilt)")
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"{path} has index format {meta.get('format')}, expected {INDEX_FORMAT}")
+        idx = cls(meta['k'])
+        idx.names = meta['names']
+        idx.source = tuple(meta['source']) if meta['source'] else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in _ARRAYS}
+        idx.codes, idx.recs, idx.pos = arrays['codes'], arrays['recs'], arrays['pos']
+        idx.seq_bytes, idx.offsets = arrays['seq'], arrays['offsets']
+        return idx
+
+    def seed_diagonals(self, query: str, max_occ: int = 1000) -> Dict[int, Dict[int, int]]:
+        """{record: {diagonal (t_pos - q_pos): seed count}}; k-mers seen more than max_occ times are skipped.
+        Only non-overlapping seeds count, so one chance (k+1)-mer match is a single seed, not two.
+        """
+        self._merge()
+        k = self.k
+        diags: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        last: Dict[Tuple[int, int], int] = {}
+        qcodes, ok = kmer_codes(query, k)
+        starts = np.searchsorted(self.codes, qcodes, 'left')
+        ends = np.searchsorted(self.codes, qcodes, 'right')
+        found = ok & (ends > starts) & (ends - starts <= max_occ)
+        for qpos in np.flatnonzero(found).tolist():
+            lo, hi = int(starts[qpos]), int(ends[qpos])
+            for rec, tpos in zip(self.recs[lo:hi].tolist(), self.pos[lo:hi].tolist()):
+                key = (rec, tpos-qpos)
+                if qpos >= last.get(key, -k) + k:
+                    last[key] = qpos
+                    diags[rec][tpos-qpos] += 1
+        return diags
+
+    @staticmethod
+    def best_diagonal(diags: Dict[int, int], band: int) -> Tuple[int, int]:
+        """(diagonal, pooled seeds) maximising the seeds within `band` of it; a two-pointer
+        sweep over the sorted diagonals, O(D log D) instead of rescanning all D per diagonal.
+        """
+        ds = sorted(diags.items())
+        best_d, best_n = None, 0
+        lo = hi = pooled = 0
+        for d, _ in ds:
+            while hi < len(ds) and ds[hi][0] <= d + band:
+                pooled += ds[hi][1]; hi += 1
+            while ds[lo][0] < d - band:
+                pooled -= ds[lo][1]; lo += 1
+            if pooled > best_n:
+                best_d, best_n = d, pooled
+        return best_d, best_n
+
+    @timed('kmer_search')
+    def search(self, query: str, top: int = 10, band: int = 16, min_seeds: int = 2,
+               scoring: Scoring = Scoring()) -> List[Hit]:
+        """Ranked local hits: the best-seeded diagonal of each record is extended by banded Smith-Waterman."""
+        query = query.upper()
+        hits = []
+        for rec, diags in self.seed_diagonals(query).items():
+            # pool seeds on neighbouring diagonals (indels shift the diagonal slightly)
+            best_d, best_n = self.best_diagonal(diags, band)
+            if best_n < min_seeds:
+                continue
+            target = self.seq(rec).upper()
+            lo = max(0, best_d-band)
+            hi = min(len(target), best_d+len(query)+band)
+            aln = smith_waterman(query, target[lo:hi], scoring, band=band, diagonal=best_d-lo)
+            if aln.score > 0:
+                hits.append(Hit(self.names[rec], aln.score, aln.a_start, aln.a_end,
+                                lo+aln.b_start, lo+aln.b_end, best_n))
+        hits.sort(key=lambda h: (-h.score, h.name))
+        return hits[:top]
@@ -0,0 +1,59 @@
+# Warm worker: answer JSON-lines requests on a stream so callers skip interpreter startup per call
+#
+#   {"id": 1, "op": "translate", "dna": "ATGGCC"}
+#   {"id": 2, "op": "align", "seq1": "GATTACA", "seq2": "GCATGCA", "mode": "local"}
+#   {"id": 3, "op": "fold", "rna": "GGGAAACCC", "min_loop": 3}
+import json
+from typing import Callable, Dict, IO
+from .translate import dna_to_rna, translate_dna
+from .align import needleman_wunsch, smith_waterman, align_long, xdrop_local
+from .rna_fold import nussinov
+
+def _translate(req: Dict) -> Dict:
+    dna = req['dna']
+    return {'rna': dna_to_rna(dna),
+            'protein': translate_dna(dna, frame=req.get('frame', 0), stop_behavior=req.get('stop', 'truncate'))}
+
+def _align(req: Dict) -> Dict:
+    mode, a, b = req.get('mode', 'global'), req['seq1'], req['seq2']
+    if mode == 'global':
+        aln = needleman_wunsch(a, b, band=req.get('band'))
+    elif mode == 'long':
+        aln = align_long(a, b, k=req.get('k', 21))
+    elif mode == 'local' and req.get('xdrop') is not None:
+        aln = xdrop_local(a, b, req['xdrop'])
+    elif mode == 'local':
+        aln = smith_waterman(a, b)
+    else:
+        raise ValueError(f"unknown align mode: {mode}")
+    return {'aligned_a': aln.aligned_a, 'aligned_b': aln.aligned_b, 'score': aln.score,
+            'a_start': aln.a_start, 'b_start': aln.b_start, 'cigar': aln.cigar}
+
+def _fold(req: Dict) -> Dict:
+    return {'structure': nussinov(req['rna'], min_loop=req.get('min_loop', 0))}
+
+OPS: Dict[str, Callable[[Dict], Dict]] = {'translate': _translate, 'align': _align, 'fold': _fold}
+
+def handle(line: str) -> Dict:
+    """One request line -> {"id", "ok": true, **result} or {"id", "ok": false, "error"}; never raises."""
+    req_id = None
+    try:
+        req = json.loads(line)
+        req_id = req.get('id')
+        op = OPS.get(req.get('op'))
+        if op is None:
+            raise ValueError(f"unknown op: {req.get('op')!r} (expected one of {', '.join(OPS)})")
+        return {'id': req_id, 'ok': True, **op(req)}
+    except Exception as e:  # report per request; the worker keeps serving
+        return {'id': req_id, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+def serve(inp: IO[str], out: IO[str]) -> int:
+    """Answer each non-blank input line with one output line, flushed; returns the request count."""
+    n = 0
+    for line in inp:
+        if not line.strip():
+            continue
+        out.write(json.dumps(handle(line), separators=(',', ':')) + '\n')
+        out.flush()
+        n += 1
+    return n
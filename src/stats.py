@@ -0,0 +1,176 @@
+# Base, dinucleotide and codon composition, streamed over FASTA files with 2-bit NumPy indexing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+import numpy as np
+from .io_utils import iter_fasta
+from .instrument import count, timed
+
+BASES = 'ACGT'
+DINUCS = [''.join(p) for p in product(BASES, repeat=2)]
+CODONS = [''.join(p) for p in product(BASES, repeat=3)]
+TOTAL = '*'  # name of the aggregate row in a composition table
+# A/C/G/T(U) -> 0..3, anything else (N, IUPAC codes, gaps) -> 4
+_CODES = bytes(BASES.index(chr(b).upper().replace('U', 'T')) if chr(b) in 'ACGTUacgtu' else 4 for b in range(256))
+_GC3 = np.array([c[2] in 'CG' for c in CODONS])
+
+@dataclass(eq=False)
+class Composition:
+    """Counts for one record (or a merged set): bases [A, C, G, T, other], 16 dinucleotides, 64 frame-0 codons.
+    Codons and dinucleotides containing a non-ACGT base are skipped. Compositions add up with `+`.
+    """
+    name: str
+    bases: np.ndarray
+    dinucs: np.ndarray
+    codons: np.ndarray
+
+    def __add__(self, other: 'Composition') -> 'Composition':
+        return Composition(TOTAL, self.bases + other.bases, self.dinucs + other.dinucs, self.codons + other.codons)
+
+    @property
+    def length(self) -> int:
+        return int(self.bases.sum())
+
+    @property
+    def gc(self) -> float:
+        """GC% over unambiguous bases."""
+        acgt = self.bases[:4].sum()
+        return 100.0 * (self.bases[1] + self.bases[2]) / acgt if acgt else 0.0
+
+    @property
+    def gc_of_length(self) -> float:
+        """GC% over the whole record length, N and other symbols included (the per-record plot value)."""
+        n = self.length
+        return 100.0 * (self.bases[1] + self.bases[2]) / n if n else 0.0
+
+    @property
+    def gc3(self) -> float:
+        """GC% at third codon positions (frame 0)."""
+        n = self.codons.sum()
+        return 100.0 * self.codons[_GC3].sum() / n if n else 0.0
+
+    def codon_counts(self) -> Dict[str, int]:
+        return dict(zip(CODONS, self.codons.tolist()))
+
+    def dinuc_freqs(self) -> Dict[str, float]:
+        n = self.dinucs.sum()
+        return {d: (c / n if n else 0.0) for d, c in zip(DINUCS, self.dinucs.tolist())}
+
+def empty(name: str = TOTAL) -> Composition:
+    return Composition(name, np.zeros(5, np.int64), np.zeros(16, np.int64), np.zeros(64, np.int64))
+
+def composition(name: str, seq: str) -> Composition:
+    """Count one sequence: translate to 2-bit codes once, then bincount codon/dinucleotide indices."""
+    codes = np.frombuffer(seq.encode('ascii', 'replace').translate(_CODES), dtype=np.uint8)
+    ok = codes < 4
+    c = codes.astype(np.intp)
+    pair_ok = ok[:-1] & ok[1:]
+    dinucs = np.bincount((c[:-1]*4 + c[1:])[pair_ok], minlength=16)
+    n3 = len(c) // 3 * 3
+    trip = c[:n3].reshape(-1, 3)
+    codons = np.bincount((trip[:, 0]*16 + trip[:, 1]*4 + trip[:, 2])[ok[:n3].reshape(-1, 3).all(axis=1)], minlength=64)
+    return Composition(name, np.bincount(codes, minlength=5)[:5].astype(np.int64), dinucs.astype(np.int64),
+                       codons.astype(np.int64))
+
+def _batch(records: List[Tuple[str, str]]) -> List[Composition]:
+    return [composition(h, s) for h, s in records]
+
+def _batches(records: Iterable[Tuple[str, str]], batch_bases: int) -> Iterator[List[Tuple[str, str]]]:
+    batch, size = [], 0
+    for rec in records:
+        batch.append(rec)
+        size += len(rec[1])
+        if size >= batch_bases:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+def iter_compositions(path: str, jobs: int = 1, batch_bases: int = 1_000_000) -> Iterator[Composition]:
+    """Stream per-record compositions of a FASTA in file order.
+    With jobs > 1, batches of ~batch_bases are counted on a process pool, at most 2*jobs in flight.
+    """
+    records = iter_fasta(path)
+    if jobs <= 1:
+        for h, s in records:
+            yield composition(h, s)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        pending = deque()
+        for batch in _batches(records, batch_bases):
+            pending.append(ex.submit(_batch, batch))
+            if len(pending) >= 2*jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def merge(parts: Iterable[Composition]) -> Composition:
+    """Aggregate partial results (per record, per worker or per file) into one TOTAL row."""
+    total = empty()
+    for p in parts:
+        total = total + p
+    return total
+
+_COLUMNS = ['name', 'length', 'A', 'C', 'G', 'T', 'other', 'gc', 'gc3'] + DINUCS + CODONS
+
+def _row(c: Composition) -> str:
+    counts = c.bases.tolist() + c.dinucs.tolist() + c.codons.tolist()
+    return '\t'.join([c.name, str(c.length)] + [str(v) for v in counts[:5]] + [f"{c.gc:.2f}", f"{c.gc3:.2f}"]
+                     + [str(v) for v in counts[5:]])
+
+@timed('write_composition_table')
+def write_table(out, rows: Iterable[Composition]) -> Composition:
+    """Write one TSV line per composition (as they stream in) plus a final TOTAL line; returns the total.
+    `out` is a path or an open text stream.
+    """
+    f = open(out, 'w', encoding='utf-8') if isinstance(out, str) else out
+    try:
+        f.write('\t'.join(_COLUMNS) + '\n')
+        total = empty()
+        for c in rows:
+            f.write(_row(c) + '\n')
+            total = total + c
+            count('records_profiled')
+        f.write(_row(total) + '\n')
+    finally:
+        if f is not out:
+            f.close()
+    return total
+
+def read_table(path: str) -> List[Composition]:
+    """Load a table written by write_table (gc/gc3 columns are recomputed from the counts)."""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        header = next(f).rstrip('\n').split('\t')
+        if header != _COLUMNS:
+            raise ValueError(f"{path}: not a composition table")
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            counts = np.array(cols[2:7] + cols[9:], dtype=np.int64)
+            rows.append(Composition(cols[0], counts[:5], counts[5:21], counts[21:]))
+    return rows
+
+CompositionLike = Union[Dict[str, str], List[Composition]]
+
+def gc_by_record(records: CompositionLike) -> Tuple[List[str], List[float]]:
+    """(names, GC% of record length) from {name: sequence} or table rows (the TOTAL row is skipped).
+    Uses the length denominator the plots always had; the table's gc column is over ACGT only.
+    """
+    if isinstance(records, dict):
+        records = [composition(h, s) for h, s in records.items()]
+    rows = [c for c in records if c.name != TOTAL]
+    return [c.name for c in rows], [c.gc_of_length for c in rows]
+
+def codon_usage(source: Union[str, Dict[str, int], Composition, List[Composition]]) -> Dict[str, int]:
+    """Nonzero frame-0 codon counts from a sequence, a {codon: count} dict, a composition,
+    or table rows (their TOTAL row, or the sum of the rows when there is none).
+    """
+    if isinstance(source, str):
+        source = composition('', source)
+    elif isinstance(source, list):
+        totals = [c for c in source if c.name == TOTAL]
+        source = totals[0] if totals else merge(source)
+    counts = source if isinstance(source, dict) else source.codon_counts()
+    return {c: n for c, n in counts.items() if n}
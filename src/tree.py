@@ -1,6 +1,8 @@
 from typing import List, Tuple
 from dataclasses import dataclass
 import math
+import numpy as np
+from .instrument import timed
 
 @dataclass
 class Node:
@@ -8,41 +10,38 @@ class Node:
     left: 'Node' = None
     right: 'Node' = None
     height: float = 0.0  # UPGMA height (ultrametric)
+    support: float = None  # bootstrap support (0-100), if computed
 
+@timed('upgma')
 def upgma(names: List[str], D: List[List[float]]) -> Node:
+    """Average-linkage tree. Distances live in one NumPy matrix; each merge is an argmin plus
+    a weighted row update, and merged-away rows are set to inf.
+    """
     n = len(names)
-    clusters = {i: Node(name=names[i], height=0.0) for i in range(n)}
-    dist = { (i,j): D[i][j] for i in range(n) for j in range(n) if i<j }
-    sizes = { i: 1 for i in range(n) }
-    next_id = n
-    while len(clusters) > 1:
-        # find closest pair
-        (i,j), mind = min(dist.items(), key=lambda kv: kv[1])
-        # merge
-        hi = clusters[i]; hj = clusters[j]
-        new_h = mind/2
-        new_node = Node(name=f"C{next_id}", left=hi, right=hj, height=new_h)
-        # update structures
-        clusters[next_id] = new_node
-        size_i, size_j = sizes[i], sizes[j]
-        # recompute distances to new cluster
-        for k in list(clusters.keys()):
-            if k in (i,j,next_id): 
-                continue
-            dik = dist[tuple(sorted((i,k)))]
-            djk = dist[tuple(sorted((j,k)))]
-            d_new = (size_i*dik + size_j*djk) / (size_i + size_j)
-            dist[(min(k,next_id), max(k,next_id))] = d_new
-        # remove old distances
-        keys_to_del = [k for k in dist.keys() if i in k or j in k]
-        for k in keys_to_del:
-            del dist[k]
-        # finalize
-        del clusters[i]; del clusters[j]
-        sizes[next_id] = size_i + size_j
-        next_id += 1
+    M = np.array(D, dtype=float).reshape(n, n)
+    np.fill_diagonal(M, np.inf)
+    nodes = [Node(name=names[i], height=0.0) for i in range(n)]
+    ids = list(range(n))  # creation order of the cluster in each slot (keeps child order stable)
+    sizes = np.ones(n)
+    alive = np.ones(n, dtype=bool)
+    last = 0
+    for next_id in range(n, 2*n - 1):
+        i, j = divmod(int(np.argmin(M)), n)
+        if i == j or not (alive[i] and alive[j]):  # every remaining distance is inf
+            i, j = np.flatnonzero(alive)[:2]
+        if ids[i] > ids[j]:
+            i, j = j, i
+        new_node = Node(name=f"C{next_id}", left=nodes[i], right=nodes[j], height=float(M[i, j])/2)
+        row = (sizes[i]*M[i] + sizes[j]*M[j]) / (sizes[i] + sizes[j])
+        M[i, :] = M[:, i] = row
+        M[j, :] = M[:, j] = np.inf
+        M[i, i] = np.inf
+        alive[j] = False
+        # the merged cluster takes over slot i
+        nodes[i], ids[i], sizes[i] = new_node, next_id, sizes[i] + sizes[j]
+        last = i
     # return the sole cluster
-    return next(iter(clusters.values()))
+    return nodes[last]
 
 def _branch_length(parent_h, child: Node) -> float:
     return parent_h - child.height
@@ -54,5 +53,18 @@ def to_newick(node: Node) -> str:
     r = to_newick(node.right)
     bl_l = _branch_length(node.height, node.left)
     bl_r = _branch_length(node.height, node.right)
-    return f"({l}:{bl_l:.4f},{r}:{bl_r:.4f})" + (node.name or '')
+    label = f"{node.support:.0f}" if node.support is not None else (node.name or '')
+    return f"({l}:{bl_l:.4f},{r}:{bl_r:.4f})" + label
+
+def clades(node: Node) -> List[frozenset]:
+    """Leaf-name sets of every internal node (the root included)."""
+    out = []
+    def walk(nd):
+        if nd.left is None and nd.right is None:
+            return frozenset([nd.name])
+        leaves = walk(nd.left) | walk(nd.right)
+        out.append(leaves)
+        return leaves
+    walk(node)
+    return out
 
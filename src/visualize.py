@@ -1,93 +1,75 @@
 
-import math
-from typing import Dict, List, Tuple
+import io
+from typing import Dict, List, Optional, Tuple
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from .msa import MSA
+from . import stats
+from .render import MAX_CELLS, BASE_TICK_LIMIT, fig_dim, block_mean, label_ticks, arc_segments, dot_bracket_pairs
 
-def _savefig(path: str, title: str = None):
+def _savefig(path: Optional[str], title: str = None, fmt: str = 'png') -> Optional[bytes]:
+    """Save to `path`, or return the encoded figure bytes when path is None."""
     if title:
         plt.title(title)
     plt.tight_layout()
+    if path is None:
+        buf = io.BytesIO()
+        plt.savefig(buf, format=fmt, dpi=150)
+        plt.close()
+        return buf.getvalue()
     plt.savefig(path, dpi=150)
     plt.close()
 
-def plot_gc_content(records: Dict[str, str], out_path: str):
-    names = list(records.keys())
-    vals = []
-    for s in records.values():
-        s = s.upper()
-        vals.append((s.count('G') + s.count('C')) / len(s) * 100.0 if s else 0.0)
+def plot_gc_content(records: stats.CompositionLike, out_path: str = None, fmt: str = 'png'):
+    names, vals = stats.gc_by_record(records)
     plt.figure(figsize=(8,4))
     plt.bar(range(len(names)), vals)
-    plt.xticks(range(len(names)), names, rotation=45, ha='right')
+    label_ticks(plt.xticks, names, rotation=45, ha='right')
     plt.ylabel('GC%')
-    _savefig(out_path, title='GC Content per Sequence')
+    return _savefig(out_path, title='GC Content per Sequence', fmt=fmt)
 
-def codon_usage(seq: str):
-    s = seq.upper().replace('T','U')
-    counts = {}
-    for i in range(0, len(s)-2, 3):
-        c = s[i:i+3]
-        if len(c)==3 and all(ch in 'AUCG' for ch in c):
-            counts[c] = counts.get(c,0)+1
-    return counts
+def codon_usage(seq) -> Dict[str, int]:
+    return {c.replace('T', 'U'): n for c, n in stats.codon_usage(seq).items()}
 
-def plot_codon_usage(seq: str, out_path: str):
+def plot_codon_usage(seq, out_path: str = None, fmt: str = 'png'):
     cu = codon_usage(seq)
     items = sorted(cu.items())
     plt.figure(figsize=(10,4))
     plt.bar(range(len(items)), [v for _,v in items])
     plt.xticks(range(len(items)), [k for k,_ in items], rotation=90)
     plt.ylabel('Count')
-    _savefig(out_path, title='Codon Usage (frame 0)')
+    return _savefig(out_path, title='Codon Usage (frame 0)', fmt=fmt)
 
-def plot_distance_heatmap(D: List[List[float]], names: List[str], out_path: str, title: str='Distance Heatmap'):
+def plot_distance_heatmap(D: List[List[float]], names: List[str], out_path: str = None, title: str='Distance Heatmap',
+                          max_cells: int = MAX_CELLS, fmt: str = 'png'):
+    n = len(names)
     plt.figure(figsize=(5,4))
-    plt.imshow(D, aspect='auto')
+    plt.imshow(block_mean(D, max_cells, max_cells), aspect='auto', extent=(0, n, n, 0))
     plt.colorbar(label='Distance')
-    plt.xticks(range(len(names)), names, rotation=45, ha='right')
-    plt.yticks(range(len(names)), names)
-    _savefig(out_path, title=title)
+    label_ticks(plt.xticks, names, offset=0.5, rotation=45, ha='right')
+    label_ticks(plt.yticks, names, offset=0.5)
+    return _savefig(out_path, title=title, fmt=fmt)
 
-def plot_alignment(aligned: List[str], names: List[str], out_path: str):
+def plot_alignment(aligned, names: List[str], out_path: str = None, max_cells: int = MAX_CELLS, fmt: str = 'png'):
     if not aligned: 
         return
-    cols = len(aligned[0])
-    consensus = []
-    for j in range(cols):
-        col = [s[j] for s in aligned]
-        bases = [b for b in col if b!='-']
-        consensus.append(max(set(bases), key=bases.count) if bases else '-')
-    mat = []
-    for s in aligned:
-        row = [1 if ch==consensus[j] and ch!='-' else 0 for j,ch in enumerate(s)]
-        mat.append(row)
-    plt.figure(figsize=(max(6, cols*0.15), max(3, len(aligned)*0.3)))
-    plt.imshow(mat, aspect='auto')
+    aln = MSA.coerce(aligned)
+    cols = aln.n_cols
+    mat = block_mean(aln.match_matrix(), max_cells, max_cells)
+    plt.figure(figsize=(fig_dim(cols, 0.15, 6), fig_dim(aln.n_seqs, 0.3, 3)))
+    plt.imshow(mat, aspect='auto', extent=(0, cols, aln.n_seqs, 0), interpolation='nearest')
     plt.colorbar(label='Match to consensus')
-    plt.yticks(range(len(names)), names)
+    label_ticks(plt.yticks, names, offset=0.5)
     plt.xlabel('Alignment column')
-    _savefig(out_path, title='Multiple Sequence Alignment (consensus match)')
+    return _savefig(out_path, title='Multiple Sequence Alignment (consensus match)', fmt=fmt)
 
-def plot_rna_arcs(rna: str, dot_bracket: str, out_path: str):
-    pairs = []
-    stack = []
-    for i,ch in enumerate(dot_bracket):
-        if ch=='(':
-            stack.append(i)
-        elif ch==')' and stack:
-            j = stack.pop()
-            pairs.append((j,i))
-    x = list(range(len(rna)))
-    y = [0]*len(rna)
-    plt.figure(figsize=(max(8, len(rna)*0.2), 3))
-    plt.plot(x, y)
-    for i,j in pairs:
-        cx = (i+j)/2
-        r = (j-i)/2
-        pts = 60
-        xs = [cx + r*math.cos(math.pi*t/pts) for t in range(pts+1)]
-        ys = [r*math.sin(math.pi*t/pts) for t in range(pts+1)]
-        plt.plot(xs, ys)
-    plt.xticks(range(len(rna)), list(rna), rotation=90)
+def plot_rna_arcs(rna: str, dot_bracket: str, out_path: str = None, fmt: str = 'png'):
+    n = len(rna)
+    plt.figure(figsize=(fig_dim(n, 0.2, 8), 3))
+    plt.plot([0, max(n-1, 0)], [0, 0])
+    ax = plt.gca()
+    ax.add_collection(LineCollection(arc_segments(dot_bracket_pairs(dot_bracket)), colors='C1'))
+    ax.autoscale_view()
+    label_ticks(plt.xticks, list(rna), limit=BASE_TICK_LIMIT, rotation=90)
     plt.yticks([])
-    _savefig(out_path, title='RNA Base-Pair Arcs')
+    return _savefig(out_path, title='RNA Base-Pair Arcs', fmt=fmt)
@@ -1,7 +1,11 @@
 
+import io
 from typing import Dict, List, Tuple, Optional
-import math
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from .msa import MSA
+from . import stats
+from .render import MAX_CELLS, BASE_TICK_LIMIT, fig_dim, block_mean, label_ticks, arc_segments, dot_bracket_pairs
 
 # ---- Theme helpers ----------------------------------------------------------
 _THEME = {
@@ -32,7 +36,9 @@ def set_theme(font_size: int = 11):
         "savefig.bbox": "tight",
     })
 
-def _savefig(path: str, title: Optional[str] = None, xlabel: Optional[str] = None, ylabel: Optional[str] = None):
+def _savefig(path: Optional[str], title: Optional[str] = None, xlabel: Optional[str] = None,
+             ylabel: Optional[str] = None, fmt: str = 'png') -> Optional[bytes]:
+    """Save to `path`, or return the encoded figure bytes when path is None."""
     if title:
         plt.title(title, pad=10)
     if xlabel:
@@ -40,34 +46,29 @@ def _savefig(path: str, title: Optional[str] = None, xlabel: Optional[str] = Non
     if ylabel:
         plt.ylabel(ylabel)
     plt.tight_layout()
+    if path is None:
+        buf = io.BytesIO()
+        plt.savefig(buf, format=fmt, dpi=160)
+        plt.close()
+        return buf.getvalue()
     plt.savefig(path, dpi=160)
     plt.close()
 
 # ---- Plots ------------------------------------------------------------------
-def plot_gc_content(records: Dict[str, str], out_path: str):
+def plot_gc_content(records: stats.CompositionLike, out_path: str = None, fmt: str = 'png'):
     """Bar chart of GC% per sequence (how G/C-heavy each is)."""
     set_theme(_THEME["font_size"])
-    names = list(records.keys())
-    vals = []
-    for s in records.values():
-        s = s.upper()
-        vals.append((s.count('G') + s.count('C')) / len(s) * 100.0 if s else 0.0)
+    names, vals = stats.gc_by_record(records)
     plt.figure(figsize=(9, 4))
     plt.bar(range(len(names)), vals, **_THEME["gc_bar"])
-    plt.xticks(range(len(names)), names, rotation=35, ha='right')
-    _savefig(out_path, title="GC Content per Sequence", ylabel="GC (%)")
+    label_ticks(plt.xticks, names, rotation=35, ha='right')
+    return _savefig(out_path, title="GC Content per Sequence", ylabel="GC (%)", fmt=fmt)
 
-def codon_usage(seq: str):
-    """Return dict {codon: count} for frame-0 RNA (T→U)."""
-    s = seq.upper().replace('T','U')
-    counts = {}
-    for i in range(0, len(s)-2, 3):
-        c = s[i:i+3]
-        if len(c)==3 and all(ch in 'AUCG' for ch in c):
-            counts[c] = counts.get(c,0)+1
-    return counts
+def codon_usage(seq) -> Dict[str, int]:
+    """Return dict {codon: count} for frame-0 RNA (T→U); also accepts counts or composition rows."""
+    return {c.replace('T', 'U'): n for c, n in stats.codon_usage(seq).items()}
 
-def plot_codon_usage(seq: str, out_path: str):
+def plot_codon_usage(seq, out_path: str = None, fmt: str = 'png'):
     """Bar chart of codon counts (frame 0)."""
     set_theme(_THEME["font_size"])
     cu = codon_usage(seq)
@@ -78,64 +79,50 @@ def plot_codon_usage(seq: str, out_path: str):
     plt.figure(figsize=(12, 4.8))
     plt.bar(xs, counts, **_THEME["codon_bar"])
     plt.xticks(xs, labels, rotation=90)
-    _savefig(out_path, title="Codon Usage (frame 0)", ylabel="Count")
+    return _savefig(out_path, title="Codon Usage (frame 0)", ylabel="Count", fmt=fmt)
 
-def plot_distance_heatmap(D: List[List[float]], names: List[str], out_path: str, title: str='Distance Heatmap'):
-    """Heatmap of pairwise distances (p or JC69)."""
+def plot_distance_heatmap(D: List[List[float]], names: List[str], out_path: str = None, title: str='Distance Heatmap',
+                          max_cells: int = MAX_CELLS, fmt: str = 'png'):
+    """Heatmap of pairwise distances (p or JC69); large matrices are block-averaged."""
     set_theme(_THEME["font_size"])
+    n = len(names)
     plt.figure(figsize=(6.5, 5.2))
-    im = plt.imshow(D, aspect='auto', cmap=_THEME["heatmap_cmap"])
+    im = plt.imshow(block_mean(D, max_cells, max_cells), aspect='auto', cmap=_THEME["heatmap_cmap"],
+                    extent=(0, n, n, 0))
     plt.colorbar(im, label="Distance")
-    plt.xticks(range(len(names)), names, rotation=45, ha='right')
-    plt.yticks(range(len(names)), names)
-    _savefig(out_path, title=title)
+    label_ticks(plt.xticks, names, offset=0.5, rotation=45, ha='right')
+    label_ticks(plt.yticks, names, offset=0.5)
+    return _savefig(out_path, title=title, fmt=fmt)
 
-def plot_alignment(aligned: List[str], names: List[str], out_path: str):
-    """Consensus-match visualization of a multiple alignment (bright = match)."""
+def plot_alignment(aligned, names: List[str], out_path: str = None, max_cells: int = MAX_CELLS, fmt: str = 'png'):
+    """Consensus-match visualization of a multiple alignment (bright = match).
+    Above max_cells rows/columns, blocks are averaged (shade = fraction matching)."""
     if not aligned:
         return
     set_theme(_THEME["font_size"])
-    cols = len(aligned[0])
-    consensus = []
-    for j in range(cols):
-        col = [s[j] for s in aligned]
-        bases = [b for b in col if b!='-']
-        consensus.append(max(set(bases), key=bases.count) if bases else '-')
-    mat = []
-    for s in aligned:
-        row = [1 if ch==consensus[j] and ch!='-' else 0 for j,ch in enumerate(s)]
-        mat.append(row)
-    plt.figure(figsize=(max(7, cols*0.2), max(3.2, len(aligned)*0.38)))
-    im = plt.imshow(mat, aspect='auto', cmap=_THEME["msa_cmap"], vmin=0, vmax=1)
+    aln = MSA.coerce(aligned)
+    cols = aln.n_cols
+    mat = block_mean(aln.match_matrix(), max_cells, max_cells)
+    plt.figure(figsize=(fig_dim(cols, 0.2, 7), fig_dim(aln.n_seqs, 0.38, 3.2)))
+    im = plt.imshow(mat, aspect='auto', cmap=_THEME["msa_cmap"], vmin=0, vmax=1,
+                    extent=(0, cols, aln.n_seqs, 0), interpolation='nearest')
     plt.colorbar(im, label="Match to consensus")
-    plt.yticks(range(len(names)), names)
+    label_ticks(plt.yticks, names, offset=0.5)
     plt.xlabel('Alignment column')
-    _savefig(out_path, title="Multiple Sequence Alignment (Consensus Match)")
+    return _savefig(out_path, title="Multiple Sequence Alignment (Consensus Match)", fmt=fmt)
 
-def plot_rna_arcs(rna: str, dot_bracket: str, out_path: str):
-    """Arc diagram from dot-bracket (paired bases draw semicircles)."""
+def plot_rna_arcs(rna: str, dot_bracket: str, out_path: str = None, fmt: str = 'png'):
+    """Arc diagram from dot-bracket (paired bases draw semicircles), all arcs in one LineCollection."""
     set_theme(_THEME["font_size"])
-    pairs = []
-    stack = []
-    for i, ch in enumerate(dot_bracket):
-        if ch == '(':
-            stack.append(i)
-        elif ch == ')' and stack:
-            j = stack.pop()
-            pairs.append((j, i))
-    x = list(range(len(rna)))
-    y = [0] * len(rna)
-    plt.figure(figsize=(max(8, len(rna)*0.22), 3.2))
+    n = len(rna)
+    plt.figure(figsize=(fig_dim(n, 0.22, 8), 3.2))
     # baseline
-    plt.plot(x, y, color="#999", linewidth=1)
+    plt.plot([0, max(n-1, 0)], [0, 0], color="#999", linewidth=1)
     # arcs
-    for i, j in pairs:
-        cx = (i + j) / 2
-        r = (j - i) / 2
-        pts = 64
-        xs = [cx + r * math.cos(math.pi * t / pts) for t in range(pts + 1)]
-        ys = [r * math.sin(math.pi * t / pts) for t in range(pts + 1)]
-        plt.plot(xs, ys, color=_THEME["arc_color"], linewidth=1.6)
-    plt.xticks(range(len(rna)), list(rna), rotation=90)
+    ax = plt.gca()
+    ax.add_collection(LineCollection(arc_segments(dot_bracket_pairs(dot_bracket)),
+                                     colors=_THEME["arc_color"], linewidths=1.6))
+    ax.autoscale_view()
+    label_ticks(plt.xticks, list(rna), limit=BASE_TICK_LIMIT, rotation=90)
     plt.yticks([])
-    _savefig(out_path, title="RNA Base-Pair Arcs")
+    return _savefig(out_path, title="RNA Base-Pair Arcs", fmt=fmt)
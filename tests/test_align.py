@@ -8,3 +8,78 @@ def test_global_alignment():
 def test_local_alignment():
     a,b,s = smith_waterman('GATTACA','GCATGCU')
     assert s >= 0
+
+def test_kmer_center_msa():
+    from src.align import center_star_msa, center_agreement
+    seqs = ['ACGTACGTAC', 'ACGTACGTTC', 'ACGAACGTAC', 'TTGTACGTAC']
+    aln = center_star_msa(seqs, center='kmer', k=3)
+    assert len({len(r) for r in aln}) == 1
+    assert [r.replace('-', '') for r in aln] == seqs
+    # the second family's k-mer profiles favour record 0, its alignment scores record 2
+    rate, centers = center_agreement([seqs, ['TTAGTTGT', 'GCCGCAGC', 'GAAGTAGT']], k=3)
+    assert rate == 0.5 and centers == [(0, 0), (2, 0)]
+
+def test_center_star_merges_indels_from_every_pair():
+    from src.align import center_star_msa
+    base = 'ACGTTGCAAGGCTTACCGATGACT'
+    seqs = [base, base[:5] + base[6:], base[:12] + 'T' + base[12:], base[:18] + base[19:] + 'G']
+    for center in ('exact', 'kmer'):
+        aln = center_star_msa(seqs, center=center)
+        assert len({len(r) for r in aln}) == 1
+        assert [r.replace('-', '') for r in aln] == seqs
+
+def test_banded_matches_full_on_similar_seqs():
+    a = 'ACGTTGCAAGGCTTACGATCGATCGGATCCA'
+    b = 'ACGTTGCAAGCTTACGATCGTTCGGATCCAG'
+    assert needleman_wunsch(a, b, band='auto')[2] == needleman_wunsch(a, b)[2]
+    al_a, al_b, _ = needleman_wunsch(a, b, band=2)
+    assert al_a.replace('-', '') == a and al_b.replace('-', '') == b
+
+def test_xdrop_local_alignment():
+    import random
+    from src.align import xdrop_local
+    # no shared 8-mer: falls back to the full local fill
+    assert xdrop_local('TTTTGATTACATTTT', 'GGGGATTACAGGG', xdrop=3)[2] == smith_waterman('TTTTGATTACATTTT', 'GGGGATTACAGGG')[2]
+    assert xdrop_local('GTTTCCCCCCCC', 'GAAACCCCCCCC', xdrop=0).score == 8
+    # a short early match must not end the search: extension starts from the best-seeded diagonal
+    rng = random.Random(3)
+    rand = lambda n: ''.join(rng.choice('ACGT') for _ in range(n))
+    m10, m40 = rand(10), rand(40)
+    a, b = rand(20) + m10 + rand(60) + m40 + rand(20), rand(20) + m10 + rand(60) + m40 + rand(20)
+    aln = xdrop_local(a, b, xdrop=5)
+    assert aln.score >= 40 and m40 in a[aln.a_start:aln.a_end]
+    assert aln.aligned_a.replace('-', '') == a[aln.a_start:aln.a_end]
+    assert xdrop_local(a, b, xdrop=20).score == smith_waterman(a, b).score
+
+def test_align_long_stitches_anchors():
+    from src.align import align_long
+    a = 'ACGTTGCAAGGCTTACGATCGATCGGATCCATTGACCAGTAGGCATCGA' * 3
+    b = a[:40] + 'T' + a[41:100] + a[103:]
+    al_a, al_b, s = align_long(a, b, k=10, max_cells=500)
+    assert al_a.replace('-', '') == a and al_b.replace('-', '') == b
+    assert s == needleman_wunsch(a, b)[2]
+
+def test_edit_distance_bit_vector():
+    from src.align import edit_distance
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('', 'ACG') == 3
+    assert edit_distance('ACGTACGT', 'TTTTTTTT', max_dist=2) == 3
+
+def test_batched_edit_distances_match_single():
+    import random
+    from src.align import edit_distance, edit_distances
+    rng = random.Random(7)
+    pairs = [(''.join(rng.choice('ACGT') for _ in range(rng.randint(0, 150))),
+              ''.join(rng.choice('ACGTN') for _ in range(rng.randint(0, 150)))) for _ in range(80)]
+    pairs += [(a, a[:40] + 'GA' + a[45:]) for a, _ in pairs[:20]]
+    limits = [rng.choice([None, 0, 5, 60]) for _ in pairs]
+    assert edit_distances(pairs, limits) == [edit_distance(a, b, lim) for (a, b), lim in zip(pairs, limits)]
+    assert edit_distances(pairs) == [edit_distance(a, b) for a, b in pairs]
+
+def test_alignment_cigar_and_tuple_compat():
+    aln = needleman_wunsch('GATTACA', 'GATCA')
+    a, b, s = aln
+    assert (a, b, s) == tuple(aln) and aln[2] == s
+    assert aln.matches + aln.mismatches + aln.gaps == len(a)
+    assert aln.gaps == 2 and aln.cigar.endswith('=')
+    assert hash(aln) == hash((a, b, s)) and {aln: 1}[(a, b, s)] == 1
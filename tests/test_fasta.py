@@ -7,3 +7,8 @@ def test_fasta_roundtrip(tmp_path):
     write_fasta(str(p), recs, width=4)
     out = read_fasta(str(p))
     assert out == recs
+
+def test_parse_fasta_from_buffer():
+    from src.io_utils import parse_fasta
+    buf = io.StringIO(">a\nacg\nt\n\n>b\nGG\n")
+    assert parse_fasta(buf) == {'a': 'ACGT', 'b': 'GG'}
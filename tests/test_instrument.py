@@ -0,0 +1,20 @@
+import json
+from src import instrument
+from src.align import needleman_wunsch
+
+def test_counters_and_chrome_trace(tmp_path):
+    instrument.reset()
+    needleman_wunsch('ACGT', 'ACG')
+    assert not instrument.counters  # off by default
+    instrument.enable()
+    try:
+        with instrument.stage('pair'):
+            needleman_wunsch('ACGT', 'ACG')
+    finally:
+        instrument.enable(False)
+    assert instrument.counters['alignments'] == 1 and instrument.counters['dp_cells'] == 12
+    p = tmp_path/'trace.json'
+    instrument.write_chrome_trace(str(p))
+    events = json.loads(p.read_text())['traceEvents']
+    assert any(e['ph'] == 'X' and e['name'] == 'pair' for e in events)
+    instrument.reset()
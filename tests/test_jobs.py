@@ -0,0 +1,34 @@
+import time
+from src.jobs import JobRunner
+from src.distance import distance_matrix
+from src.rna_fold import nussinov
+
+def test_job_progress_and_cancel():
+    runner = JobRunner(max_workers=2)
+    try:
+        job = runner.submit('dist', distance_matrix, ['ACGT', 'ACGA', 'TCGA'], model='p')
+        D = job.result(timeout=30)
+        assert D == distance_matrix(['ACGT', 'ACGA', 'TCGA'], model='p')
+        assert job.progress() == (3, 3)
+        slow = runner.submit('fold', nussinov, 'GCAU'*150)
+        while slow.progress()[0] == 0 and not slow.done():
+            time.sleep(0.05)
+        slow.cancel()
+        while not slow.done():
+            time.sleep(0.05)
+        assert slow.cancelled()
+    finally:
+        runner.shutdown()
+
+def test_prune_forgets_idle_jobs():
+    runner = JobRunner(max_workers=1)
+    try:
+        job = runner.submit('a:dist', distance_matrix, ['ACGT', 'ACGA'], model='p')
+        job.result(timeout=30)
+        runner.submit('b:dist', distance_matrix, ['ACGT', 'ACGA'], model='p')
+        assert runner.prune(idle=60) == 0 and len(runner.jobs) == 2
+        runner.get('b:dist').touched -= 120
+        assert runner.prune(idle=60) == 1 and list(runner.jobs) == ['a:dist']
+        assert runner.pop('a:dist') is job and runner.get('a:dist') is None
+    finally:
+        runner.shutdown()
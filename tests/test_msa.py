@@ -0,0 +1,18 @@
+from src.msa import MSA
+from src.align import center_star_msa
+from src.distance import aligned_p_distance
+
+def test_msa_stats():
+    aln = MSA(['ACGT-', 'ACGTA', 'AGGTA'])
+    assert aln[1] == 'ACGTA' and len(aln) == 3 and aln.n_cols == 5
+    assert aln == ['ACGT-', 'ACGTA', 'AGGTA'] and aln == MSA(list(aln)) and aln != None and aln != 3
+    assert aln.consensus() == 'ACGTA'
+    assert list(aln.gap_fraction()) == [0, 0, 0, 0, 1/3]
+    assert aln.entropy()[0] == 0.0 and aln.entropy()[1] > 0
+    P = aln.p_distances()
+    assert abs(P[0][2] - aligned_p_distance(aln[0], aln[2])) < 1e-12
+
+def test_center_star_returns_msa():
+    aln = center_star_msa(['GATTACA', 'GATCA', 'GATTACA'])
+    assert isinstance(aln, MSA)
+    assert [r.replace('-', '') for r in aln] == ['GATTACA', 'GATCA', 'GATTACA']
@@ -0,0 +1,38 @@
+import os
+from src.pipeline import Stage, run_pipeline
+
+def double(x):
+    return 2*x
+
+def double_a(a):
+    return 2*a
+
+def pid(a):
+    return os.getpid()
+
+def add(a, b, offset=0):
+    return a + b + offset
+
+def stages(offset):
+    return [
+        Stage('a', double, ('x',), persist=True),
+        Stage('b', double_a, ('a',), persist=True),
+        Stage('c', add, ('a', 'b'), {'offset': offset}),
+    ]
+
+def test_pipeline_runs_dag_and_reuses_cache(tmp_path):
+    res, runs = run_pipeline(stages(0), {'x': 3}, jobs=2, cache_dir=str(tmp_path))
+    assert (res['a'], res['b'], res['c']) == (6, 12, 18)
+    assert not any(r.cached for r in runs)
+    res, runs = run_pipeline(stages(1), {'x': 3}, jobs=1, cache_dir=str(tmp_path))
+    assert res['c'] == 19
+    assert {r.name for r in runs if r.cached} == {'a', 'b'}
+
+def test_version_bump_misses_cache_and_exclusive_runs_in_process(tmp_path):
+    run_pipeline(stages(0), {'x': 3}, cache_dir=str(tmp_path))
+    bumped = stages(0)
+    bumped[1].version = 2
+    res, runs = run_pipeline(bumped + [Stage('p', pid, ('a',), exclusive=True)], {'x': 3}, jobs=2,
+                             cache_dir=str(tmp_path))
+    assert {r.name for r in runs if r.cached} == {'a'}
+    assert res['p'] == os.getpid()
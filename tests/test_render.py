@@ -0,0 +1,14 @@
+import numpy as np
+from src.render import block_mean, arc_segments, dot_bracket_pairs
+
+def test_block_mean_bounds_shape():
+    mat = np.ones((1000, 5000))
+    out = block_mean(mat, 100, 200)
+    assert out.shape == (100, 200) and np.allclose(out, 1.0)
+    assert block_mean([[1, 2], [3, 4]]).shape == (2, 2)
+
+def test_arc_segments_from_dot_bracket():
+    pairs = dot_bracket_pairs('((..))')
+    assert sorted(pairs) == [(0, 5), (1, 4)]
+    seg = arc_segments(pairs)
+    assert seg.shape[0] == 2 and np.allclose(seg[0, 0], [4, 0]) and np.allclose(seg[0, -1], [1, 0])
@@ -0,0 +1,47 @@
+from src.search import KmerIndex
+
+def test_search_finds_planted_match(tmp_path):
+    idx = KmerIndex(k=5)
+    idx.add('decoy', 'TTTTTTTTTTTTTTTTTTTTTTTT')
+    idx.add('target', 'CCCCCGATTACAGATTACAGGGCCCCC')
+    hits = idx.search('GATTACAGATTACAGGG')
+    assert hits[0].name == 'target'
+    assert (hits[0].t_start, hits[0].t_end) == (5, 22)
+    p = tmp_path/'db.idx'
+    idx.save(str(p))
+    assert KmerIndex.load(str(p)).search('GATTACAGATTACAGGG')[0].score == hits[0].score
+
+def test_seed_pooling_counts_non_overlapping_seeds():
+    idx = KmerIndex(k=4)
+    idx.add('rep', 'A'*500)
+    diags = idx.seed_diagonals('A'*40)
+    assert max(diags[0].values()) == 10  # 37 overlapping 4-mer hits, 10 disjoint ones
+    assert KmerIndex.best_diagonal({0: 2, 3: 1, 10: 5, 30: 1}, band=3) == (10, 5)
+    assert KmerIndex.best_diagonal({0: 2, 3: 1, 5: 1}, band=3) == (3, 4)
+
+def test_index_records_its_database(tmp_path):
+    from src.io_utils import write_fasta
+    db = tmp_path/'db.fa'
+    write_fasta(str(db), {'t': 'GATTACAGATTACAGGG'})
+    p = tmp_path/'db.idx'
+    KmerIndex.from_fasta(str(db), k=5).save(str(p))
+    idx = KmerIndex.load(str(p))
+    assert idx.stale_reason(str(db), 5) is None and idx.stale_reason(None, None) is None
+    assert 'k=5' in idx.stale_reason(str(db), 7)
+    assert idx.stale_reason(str(tmp_path/'other.fa')) is not None
+
+def test_saved_index_is_memory_mapped(tmp_path):
+    import numpy as np
+    import pytest
+    idx = KmerIndex(k=5)
+    idx.add('t', 'ccccgattacagattacagggNNNN')
+    p = tmp_path/'db.idx'
+    idx.save(str(p))
+    loaded = KmerIndex.load(str(p))
+    assert isinstance(loaded.codes, np.memmap) and loaded.seq(0) == 'ccccgattacagattacagggNNNN'
+    assert len(loaded.codes) == 17  # lowercase k-mers are indexed, ones containing N are not
+    assert loaded.search('GATTACAGATTACA')[0].name == 't'
+    old = tmp_path/'old.idx'
+    old.write_bytes(b'not an index directory')
+    with pytest.raises(ValueError):
+        KmerIndex.load(str(old))
@@ -0,0 +1,22 @@
+import io
+import json
+import subprocess
+import sys
+from src.serve import serve
+
+def test_serve_jsonl_round_trip():
+    reqs = ['{"id": 1, "op": "translate", "dna": "ATGGCCTAA"}', '',
+            '{"id": 2, "op": "align", "seq1": "GATTACA", "seq2": "GATTACA"}',
+            '{"id": 3, "op": "fold", "rna": "GGGAAACCC", "min_loop": 3}',
+            '{"id": 4, "op": "nope"}', 'not json']
+    out = io.StringIO()
+    assert serve(io.StringIO('\n'.join(reqs) + '\n'), out) == 5
+    res = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert res[0] == {'id': 1, 'ok': True, 'rna': 'AUGGCCUAA', 'protein': 'MA'}
+    assert res[1]['score'] == 7 and res[1]['cigar'] == '7='
+    assert res[2]['structure'] == '(((...)))'
+    assert [r['ok'] for r in res[3:]] == [False, False] and res[3]['id'] == 4
+
+def test_cli_import_is_light():
+    code = "import sys, src.cli; print(any(m in sys.modules for m in ('numpy', 'matplotlib', 'src.align')))"
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True).stdout.strip() == 'False'
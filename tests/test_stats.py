@@ -0,0 +1,23 @@
+import numpy as np
+from src.io_utils import write_fasta
+from src.stats import TOTAL, composition, gc_by_record, iter_compositions, merge, read_table, write_table, codon_usage
+
+def test_composition_counts():
+    c = composition('s', 'ATGNCGcgu')
+    assert c.bases.tolist() == [1, 2, 3, 2, 1]  # U counts as T, lowercase folded, N is "other"
+    assert codon_usage(c) == {'ATG': 1, 'CGT': 1}  # NCG is skipped
+    assert c.dinucs.sum() == 6 and c.gc3 == 50.0
+    assert c.gc == 62.5
+    assert gc_by_record({'s': 'ATGNCGcgu'}) == (['s'], [c.gc_of_length]) and c.gc_of_length == 500/9
+
+def test_table_round_trip_and_parallel_merge(tmp_path):
+    fa = tmp_path / 'f.fa'
+    write_fasta(str(fa), {f"r{i}": 'ACGTTGCA'*(i+1) + 'NNATG' for i in range(7)})
+    serial = list(iter_compositions(str(fa)))
+    parallel = list(iter_compositions(str(fa), jobs=2, batch_bases=20))
+    assert [c.name for c in parallel] == [c.name for c in serial]
+    total = write_table(str(tmp_path / 'c.tsv'), parallel)
+    assert np.array_equal(total.codons, merge(serial).codons)
+    rows = read_table(str(tmp_path / 'c.tsv'))
+    assert rows[-1].name == TOTAL and rows[-1].length == total.length
+    assert codon_usage(rows) == codon_usage(total)
@@ -8,3 +8,25 @@ def test_upgma_small():
     root = upgma(names, D)
     nwk = to_newick(root) + ';'
     assert nwk.endswith(';')
+
+def test_bootstrap_support_labels():
+    from src.bootstrap import bootstrap_support
+    from src.distance import msa_distance_matrix
+    aln = ['AAAAAAAA', 'AAAAAAAT', 'TTTTAATT']
+    names = ['s1','s2','s3']
+    root = upgma(names, msa_distance_matrix(aln))
+    bootstrap_support(root, aln, names, replicates=50, model='p')
+    inner = root.left if root.left.left is not None else root.right
+    assert {inner.left.name, inner.right.name} == {'s1', 's2'}
+    # (s1,s2) only loses replicates that draw the last column more often than the five s3-only columns
+    assert 80.0 <= inner.support < 100.0
+    nwk = to_newick(root)
+    assert f"(s1:0.0625,s2:0.0625){inner.support:.0f}" in nwk and nwk.endswith(')100')
+
+def test_distance_prefilter_and_clusters():
+    from src.distance import threshold_clusters
+    seqs = ['ACGTACGTAC', 'ACGTACGTAA', 'TTTTGGGGCC']
+    assert sorted(threshold_clusters(seqs, 0.2)) == [[0, 1], [2]]
+    # a long insertion is far in edit distance but p_distance skips gap columns
+    base = 'ACGTTGCAAGGCTTACCGATGACT' * 4
+    assert distance_matrix([base, base[:50] + 'T'*30 + base[50:]], model='p')[0][1] == 0.0